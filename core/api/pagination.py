@@ -0,0 +1,107 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+# this class paginates words by keyset: the next page starts after the last word of the previous page by the values
+# of its ordering fields (know flags, id) instead of OFFSET, so the first and the thousandth page cost the same.
+# The count of words is calculated only if the client requests it by "count=true".
+# Example: /api/words/?pagination=cursor&page_size=20&count=true
+class WordCursorPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.count = queryset.count() if self.is_count_requested(request) else None
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        # one extra word shows whether the next page exists
+        words = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        self.has_next = len(words) > self.page_size
+        self.page = words[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        response = {'next': self.get_next_link(), 'results': data}
+
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        last_word = self.page[-1]
+        position = [getattr(last_word, field.lstrip('-')) for field in self.ordering]
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param,
+                                   self.encode_cursor(position))
+
+    # the ordering of the view (for example, by rank of search) is kept, id makes it unique
+    @staticmethod
+    def get_ordering(queryset):
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+
+        if 'id' not in ordering and '-id' not in ordering:
+            ordering.append('id')
+        return ordering
+
+    # words after the position: (a > A) or (a = A and b > B) or (a = A and b = B and id > I)
+    def after(self, position):
+        condition, equal = Q(), Q()
+
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+
+        if page_size <= 0:
+            return api_settings.PAGE_SIZE
+        return min(page_size, self.max_page_size)
+
+    def is_count_requested(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if not encoded:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    @staticmethod
+    def encode_cursor(position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
@@ -9,6 +9,7 @@ class WordSerializer(serializers.Serializer):
     sentence = serializers.CharField()
     full_audio_word_path = serializers.CharField()
     full_audio_sentence_path = serializers.CharField()
+    audio_status = serializers.CharField()
     know_studying_to_native = serializers.BooleanField()
     know_native_to_studying = serializers.BooleanField()
     is_known = serializers.BooleanField()
@@ -1,7 +1,17 @@
-from core.models import Word, StudyingLanguage
-from rest_framework import permissions, viewsets
-from django.db.models import Q
+from celery import group
+from core.models import Word
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from django.db import transaction
+from core.api.pagination import WordCursorPagination
 from core.api.serializers import WordSerializer, StudyingLanguageSerializer 
+from core.lib.import_words import ImportWords
+from core.lib.review_queue import ReviewQueue
+from core.lib.schedulers import Scheduler
+from core.lib.studying_languages import StudyingLanguages
+from core.lib.submit_answers import SubmitAnswers
+from core.lib.word_search import WordSearch
+from core.tasks import generate_word_audio
 from rest_framework.views import APIView
 from rest_framework.response import Response 
 
@@ -11,11 +21,26 @@ class WordViewSet(viewsets.ModelViewSet):
     serializer_class = WordSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @property
+    def paginator(self):
+        # "pagination=cursor" (used by infinite scrolling in words.js) switches to keyset pagination,
+        # pages by number are kept for other clients
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+
+            if params.get('pagination') == 'cursor' or params.get(WordCursorPagination.cursor_query_param):
+                self._paginator = WordCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
     def get_queryset(self):
         # which language the user is studying now
-        studying_lang = self.request.user.profile.studying_lang
+        studying_lang = self.request.study.studying_lang
         # retrieve all user's words by studying_lang
         queryset = Word.objects.filter(studying_lang=studying_lang, added_by=self.request.user).order_by('know_native_to_studying', 'know_studying_to_native')
+        # audios of the whole page are loaded by one query instead of two queries per word
+        queryset = queryset.prefetch_related('gttsaudio_set')
         
         word = self.request.query_params.get('word')
         translation = self.request.query_params.get('translation')
@@ -23,7 +48,8 @@ class WordViewSet(viewsets.ModelViewSet):
         exact_word = self.request.query_params.get('exact_word')
 
         if common_query:
-            return queryset.filter(Q(translation__contains=common_query) | Q(word__contains=common_query))
+            # ranked search by words and translations, the backend depends on the database (see WordSearch)
+            return WordSearch(queryset).perform(common_query)
 
         search_params = {}
 
@@ -40,6 +66,42 @@ class WordViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(**search_params)
         return queryset
 
+    # POST /api/words/import/ imports many words at once.
+    # json: {"format": "json", "words": [{"word": .., "translation": .., "sentence": ..}, ..]} (or the list as json text)
+    # csv or anki: {"format": "csv", "content": "..."} or multipart request with "file" and "format"
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_words(self, request):
+        studying_lang = request.study.studying_lang
+
+        if not studying_lang:
+            return Response({'status': 'studying_lang is not chosen'}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('format', 'json')
+        upload = request.FILES.get('file')
+
+        try:
+            if upload:
+                content = upload.read().decode('utf-8-sig')
+            else:
+                content = request.data.get('words' if file_format == 'json' else 'content', '')
+            rows = ImportWords.parse(content, file_format)
+        except (ValueError, UnicodeDecodeError):
+            return Response({'status': 'invalid content or format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(rows) > ImportWords.MAX_ROWS:
+            return Response({'status': f'too many words, the limit is {ImportWords.MAX_ROWS}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        created, skipped = ImportWords(request.user, studying_lang).perform(rows)
+
+        if created:
+            # audios of all imported words are generated by one group of celery tasks after committing
+            audio_jobs = group([generate_word_audio.si(word.id) for word in created])
+            transaction.on_commit(audio_jobs.apply_async)
+
+        return Response({'status': 'ok', 'created': len(created), 'skipped': skipped},
+                        status=status.HTTP_201_CREATED)
+
 
 class ToggleLanguage(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -60,15 +122,97 @@ class ToggleLanguage(APIView):
             
             return Response({'status': 'ok', 'lang': 'None'})
         
-        # retrieving StudyingLanguage object from existing studying languages
-        studying_languages = StudyingLanguage.objects.filter(name=target_studying_lang)
-            
-        # assigning StudyingLanguage only if it already exists in db
-        if not studying_languages:
+        # an unknown name is rejected before the lookup, so it doesn't reload studying languages
+        if target_studying_lang not in [language.name for language in StudyingLanguages.all()]:
             return Response({'status': 'invalid value of studying_lang'})
+
+        # retrieving StudyingLanguage object from existing studying languages (without queries)
+        studying_lang = StudyingLanguages.get(target_studying_lang)
         
-        profile.studying_lang = studying_languages[0]
+        profile.studying_lang = studying_lang
         profile.save()
         
         return Response({'status': 'ok', 'lang': profile.studying_lang.name, 'full_lang_name': profile.studying_lang.full_name})
 
+
+
+# GET /api/cards/?direction=studying_to_native&seed=<seed>&after=<id of the last card>&count=<K>
+# returns the next K cards of the review queue (with audio paths), so the exercise page needs one request per K cards
+class CardsApi(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    DEFAULT_COUNT = 10
+    MAX_COUNT = 50
+
+    def get(self, request, format=None):
+        direction = request.query_params.get('direction', 'studying_to_native')
+        studying_lang = request.study.studying_lang
+
+        words = Word.objects.filter(added_by=request.user, studying_lang=studying_lang).prefetch_related('gttsaudio_set')
+
+        try:
+            queue = ReviewQueue(words, direction, seed=request.query_params.get('seed'))
+            after = request.query_params.get('after')
+            after = int(after) if after else None
+        except ValueError:
+            return Response({'status': 'invalid direction or card'}, status=status.HTTP_400_BAD_REQUEST)
+
+        count = self.count(request.query_params.get('count'))
+        # one extra card shows whether there are more cards after this batch
+        cards = list(queue.upcoming(after, count + 1))
+
+        return Response({
+            'status': 'ok',
+            'direction': direction,
+            'seed': queue.seed,
+            'cards': WordSerializer(cards[:count], many=True).data,
+            'has_more': len(cards) > count,
+        })
+
+    def count(self, value):
+        try:
+            count = int(value)
+        except (TypeError, ValueError):
+            return self.DEFAULT_COUNT
+        return min(max(count, 1), self.MAX_COUNT)
+
+
+# POST /api/cards/answers/ {"answers": [{"id": 1, "direction": "studying_to_native", "correctness": true}, ..]}
+# applies all answers of the batch of cards at once
+class AnswersApi(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, format=None):
+        answers = request.data.get('answers')
+
+        if not isinstance(answers, list):
+            return Response({'status': 'missing key answers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(answers) > SubmitAnswers.MAX_ANSWERS:
+            return Response({'status': f'too many answers, the limit is {SubmitAnswers.MAX_ANSWERS}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        applied, skipped = SubmitAnswers(request.user).perform(answers)
+
+        return Response({'status': 'ok', 'applied': applied, 'skipped': skipped})
+
+
+# PATCH /choose_scheduler {"scheduler": "ladder" | "sm2" | "fsrs"} changes the scheduler of the user's words
+class ChooseScheduler(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def patch(self, request, format=None):
+        try:
+            scheduler = Scheduler.by_name(request.data.get('scheduler'))
+        except ValueError:
+            return Response({'status': 'invalid value of scheduler'}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile = request.user.profile
+
+        if profile.scheduler != scheduler.NAME:
+            with transaction.atomic():
+                # the state of words which was written by the previous scheduler is reset for the new one
+                scheduler.start(Word.objects.filter(added_by=request.user))
+                profile.scheduler = scheduler.NAME
+                profile.save()
+
+        return Response({'status': 'ok', 'scheduler': profile.scheduler})
@@ -0,0 +1,13 @@
+# the studying language, other languages and the auth token are used by the navigation bar of every page,
+# they are taken from request.study (see StudyContext), so they are loaded once per request
+def study(request):
+    study = getattr(request, 'study', None)
+
+    if study is None or not study.user:
+        return {}
+
+    return {
+        'studying_lang': study.studying_lang,
+        'other_languages': study.available_languages,
+        'auth_token': study.auth_token,
+    }
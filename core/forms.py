@@ -3,9 +3,10 @@ from django.contrib import messages
 from django.contrib.auth import authenticate, login, get_user_model
 from django.contrib.auth.models import User
 from django.core import validators
+from django.db import transaction
 
-from core.lib.generate_audio import GenerateAudio
 from core.models import Word, STUDYING_LANGUAGES
+from core.tasks import generate_word_audio
 
 
 class SignInForm(forms.Form):
@@ -91,8 +92,10 @@ class AddWordForm(forms.Form):
         try:
             if words.count() == 0:
                 sl = request.user.profile.studying_lang
-                word = Word.objects.create(added_by=request.user, studying_lang=sl, **self.cleaned_data)
-                GenerateAudio(word).perform()
+                word = Word.objects.create(added_by=request.user, studying_lang=sl,
+                                           audio_status=Word.AUDIO_PENDING, **self.cleaned_data)
+                # audios are generated by celery worker as soon as the word is committed
+                transaction.on_commit(lambda: generate_word_audio.delay(word.id))
 
         except:
             messages.error(request, 'Something went wrong!')
@@ -107,17 +110,23 @@ class AddWordForm(forms.Form):
             word.word = request.POST['word']
             word.sentence = request.POST['sentence']
             word.translation = request.POST['translation']
-            word.save()
-            
+
+            targets = []
             # if we changed 'word' field we should remove previous audition and generate new
             if previous_word_value != word.word:
-                word.gttsaudio_set.filter(use='word').delete()
-                GenerateAudio(word).perform(target='word')
+                targets.append('word')
 
             # if we changed 'sentence' field of word we should remove previous audition and generate new
             if previous_sentence_value != word.sentence:
-                word.gttsaudio_set.filter(use='sentence').delete()
-                GenerateAudio(word).perform(target='sentence')
+                targets.append('sentence')
+
+            if targets:
+                word.audio_status = Word.AUDIO_PENDING
+            word.save()
+
+            if targets:
+                word.gttsaudio_set.filter(use__in=targets).delete()
+                transaction.on_commit(lambda: generate_word_audio.delay(word.id, targets))
         except:
             messages.error(request, 'Something went wrong!')
         else:
@@ -0,0 +1,103 @@
+import statistics
+import time
+
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from core.lib.review_queue import ReviewQueue
+from core.models import Profile, Word
+
+
+# this class measures response times of pages and api of one user through django test client (middlewares,
+# views, templates and the database, without the network). Every case is requested once to warm up caches
+# and then "repeat" times. The median, the minimum and the maximum time (in ms) and the count of queries
+# (see QueryCountMiddleware) of every case are returned.
+# Example: Benchmark(user, repeat=5).perform() -> {'IndexView': {'median_ms': 12.3, ..., 'queries': 7}, ...}
+class Benchmark:
+    # the order of cards is the same in all runs
+    SEED = 1
+
+    def __init__(self, user, repeat=5):
+        if repeat <= 0:
+            raise ValueError('repeat must be positive')
+
+        self.user = user
+        self.repeat = repeat
+
+    def perform(self):
+        self.client = Client(SERVER_NAME='127.0.0.1')
+        self.client.force_login(self.user)
+        self.headers = {'Authorization': f'Token {Token.objects.get_or_create(user=self.user)[0].key}'}
+
+        return {name: self.measure(name, request, cleanup) for name, request, cleanup in self.cases()}
+
+    # (name, request, cleanup), cleanup restores the data changed by the request and isn't measured
+    def cases(self):
+        studying_lang = self.user.profile.studying_lang
+        words = Word.objects.filter(added_by=self.user, studying_lang=studying_lang)
+        queue = ReviewQueue(words, 'studying_to_native', seed=self.SEED)
+        word_id = queue.first() or words.values_list('id', flat=True).first()
+        card = f'/studying_to_native/{word_id}/'
+
+        return [
+            ('IndexView', lambda: self.client.get('/'), None),
+            ('WordListView', lambda: self.client.get('/words'), None),
+            ('ExercisesPageView', lambda: self.client.get('/exercises'), None),
+            ('StudyingToNativeCard GET', lambda: self.client.get(f'{card}?seed={self.SEED}'), None),
+            # incorrect answers keep the word in the queue, so every request does the same work
+            ('StudyingToNativeCard POST', lambda: self.client.post(card, content_type='application/json',
+                                                                   data={'direction': 'studying_to_native',
+                                                                         'correctness': False}), None),
+            ('WordViewSet list', lambda: self.client.get('/api/words/', headers=self.headers), None),
+            ('WordViewSet list (cursor)',
+             lambda: self.client.get('/api/words/?pagination=cursor', headers=self.headers), None),
+            ('WordViewSet search',
+             lambda: self.client.get(f'/api/words/?q={studying_lang}word1', headers=self.headers), None),
+            ('ToggleLanguage', lambda: self.client.patch('/toggle_lang', content_type='application/json',
+                                                         data={'studying_lang': 'bg'}, headers=self.headers),
+             lambda: Profile.objects.filter(user=self.user).update(studying_lang=studying_lang)),
+        ]
+
+    def measure(self, name, request, cleanup=None):
+        durations, queries = [], 0
+
+        for attempt in range(self.repeat + 1):
+            start = time.perf_counter()
+            response = request()
+            duration = time.perf_counter() - start
+
+            if cleanup:
+                cleanup()
+
+            if response.status_code >= 400:
+                raise ValueError(f'{name} responded with status {response.status_code}')
+
+            # the first request warms up caches
+            if attempt:
+                durations.append(duration * 1000)
+                queries = response.wsgi_request.query_stats.count
+
+        return {
+            'median_ms': round(statistics.median(durations), 3),
+            'min_ms': round(min(durations), 3),
+            'max_ms': round(max(durations), 3),
+            'queries': queries,
+        }
+
+    # cases which became slower than in the baseline by more than tolerance (0.2 is 20%) or make more queries.
+    # Results are {size: {case: stats}} like in the json of the benchmark command
+    @staticmethod
+    def regressions(baseline, results, tolerance=0.2):
+        found = []
+
+        for size, cases in results.items():
+            for name, stats in cases.items():
+                previous = baseline.get(size, {}).get(name)
+
+                if previous is None:
+                    continue
+
+                if (stats['median_ms'] > previous['median_ms'] * (1 + tolerance)
+                        or stats['queries'] > previous['queries']):
+                    found.append((size, name, previous, stats))
+        return found
@@ -0,0 +1,83 @@
+import random
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from core.lib.calculate_reset import CalculateReset
+from core.lib.progress_counters import ProgressCounters
+from core.lib.vectorized_reset import VectorizedReset
+from core.models import GttsAudio, StudyingLanguage, Word
+
+
+# this class generates synthetic users for benchmarks: the user "bench_<size>" studies English and has <size>
+# English words (every word has audios of the word and of the sentence) and a few Bulgarian words.
+# The words depend only on the seed and the size, so the benchmarks are reproducible. A user who already has
+# the same count of words is reused, otherwise the user is created again. Words and audios are created
+# by bulk_create in batches, so even 100k words take seconds.
+# Example: BenchmarkData(sizes=[10, 1000]).perform() -> [<User: bench_10>, <User: bench_1000>]
+class BenchmarkData:
+    USERNAME = 'bench_{size}'
+    PASSWORD = 'benchmark'
+    BATCH_SIZE = 2000
+    OTHER_LANGUAGE_WORDS = 10
+    # probability that the word is known in one direction
+    KNOWN_RATIO = 0.3
+
+    def __init__(self, sizes, seed=0):
+        self.sizes = list(sizes)
+        self.seed = seed
+
+    def perform(self):
+        self.en, _ = StudyingLanguage.objects.get_or_create(name='en')
+        self.bg, _ = StudyingLanguage.objects.get_or_create(name='bg')
+
+        return [self.retrieve_user(size) for size in self.sizes]
+
+    def retrieve_user(self, size):
+        username = self.USERNAME.format(size=size)
+        user = User.objects.filter(username=username).first()
+
+        if user and Word.objects.filter(added_by=user, studying_lang=self.en).count() == size:
+            return user
+
+        if user:
+            user.delete()
+
+        with transaction.atomic():
+            user = User.objects.create_user(username=username, password=self.PASSWORD, email=f'{username}@example.com')
+            user.profile.studying_lang = self.en
+            user.profile.save()
+
+            generator = random.Random(f'{self.seed}:{size}')
+            self.create_words(user, self.en, size, generator)
+            self.create_words(user, self.bg, self.OTHER_LANGUAGE_WORDS, generator)
+
+        # bulk_create doesn't send post_save, so the counters will be recalculated on the next retrieving
+        for studying_lang in (self.en, self.bg):
+            ProgressCounters(user.id, studying_lang.id).delete()
+        return user
+
+    def create_words(self, user, studying_lang, count, generator):
+        for start in range(0, count, self.BATCH_SIZE):
+            words = Word.objects.bulk_create([
+                self.build_word(user, studying_lang, number, generator)
+                for number in range(start, min(start + self.BATCH_SIZE, count))
+            ])
+
+            GttsAudio.objects.bulk_create([
+                GttsAudio(word=word, use=use, audio_name=f'my_files/bench_{word.id}_{use}.mp3')
+                for word in words for use in ('word', 'sentence')
+            ])
+
+    def build_word(self, user, studying_lang, number, generator):
+        return Word(
+            added_by=user,
+            studying_lang=studying_lang,
+            word=f'{studying_lang.name}word{number}',
+            translation=f'слово{number}',
+            sentence=f'the sentence with {studying_lang.name}word{number}',
+            know_studying_to_native=generator.random() < self.KNOWN_RATIO,
+            know_native_to_studying=generator.random() < self.KNOWN_RATIO,
+            stage=generator.choice(list(CalculateReset.STAGES)),
+            times_in_row=generator.randrange(VectorizedReset.TIMES_TO_PROMOTE + 1),
+        )
@@ -1,16 +1,20 @@
 from django.contrib.auth.models import User
+from django.db.models import Count, Q
 from core.models import StudyingLanguage
+from core.lib.progress_counters import ProgressCounters
 from typing import Optional
 
 """
 This class is used to calculate the user's progress in the language he is studying.
 it calculates total progress, progress from native to studying language and progress from studying to native language.
+All counts are retrieved by one aggregate query or from cache (see ProgressCounters).
 """
 
 class CalculateUserProgress:
     TOTAL = 'total'
     STUDYING_TO_NATIVE = 'studying_to_native'
     NATIVE_TO_STUDYING = 'native_to_studying'
+    WORDS_COUNT = 'words_count'
 
     filters = {
         TOTAL: {'know_native_to_studying': True, 'know_studying_to_native':True},
@@ -18,31 +22,70 @@ class CalculateUserProgress:
         NATIVE_TO_STUDYING: {'know_native_to_studying': True},
     }
 
-    def __init__(self, user: User, studying_lang: StudyingLanguage) -> None:
+    def __init__(self, user: User, studying_lang: Optional[StudyingLanguage], cached: bool = False) -> None:
         """
         Initialize the CalculateUserProgress instance.
+        If cached is True the counts are taken from cached progress counters.
         """
         self.words = user.word_set.filter(studying_lang=studying_lang)
-        self.total_words_count = self.words.count()
-    
-    def perform(self, type_of_progress: str) -> Optional[float]:
+
+        if cached:
+            counters = ProgressCounters(user.id, studying_lang.id if studying_lang else None)
+            self.counts = counters.retrieve(self.calculate_counts)
+        else:
+            self.counts = self.calculate_counts()
+
+        self.total_words_count = self.counts[self.WORDS_COUNT]
+
+    def calculate_counts(self) -> dict:
         """
-        Calculate the progress based on the type of progress.
+        Retrieve the count of all words and counts of known words for all types of progress by one query.
+        """
+        return self.words.aggregate(**self.aggregations())
+
+    @classmethod
+    def aggregations(cls) -> dict:
+        """
+        Build conditional counts for all types of progress (and the count of all words).
+        """
+        aggregations = {cls.WORDS_COUNT: Count('id')}
+
+        for type_of_progress, filters in cls.filters.items():
+            aggregations[type_of_progress] = Count('id', filter=Q(**filters))
+
+        return aggregations
+
+    def known_count(self, type_of_progress: str) -> int:
+        """
+        Return the count of known words for the type of progress.
         """
         if type_of_progress not in self.filters:
             raise ValueError('Invalid type of progress')
-        
+
+        return self.counts[type_of_progress]
+
+    @property
+    def unknown_count(self) -> int:
+        """
+        Return the count of words which are not known in both directions.
+        """
+        return self.total_words_count - self.known_count(self.TOTAL)
+
+    def perform(self, type_of_progress: str) -> Optional[float]:
+        """
+        Calculate the progress based on the type of progress.
+        """
+        known_count = self.known_count(type_of_progress)
+
         if self.total_words_count == 0:
             return None
-        
-        known_count = self.words.filter(**self.filters[type_of_progress]).count() 
-        
+
         return self.calculate_percentage(known_count)
-        
+
     def calculate_percentage(self, known_count: int) -> float:
         """
         Calculate the percentage of known words.
         """
         if self.total_words_count == 0:
             return 0.0
-        return round(known_count / (self.total_words_count / 100), 2)
\ No newline at end of file
+        return round(known_count / (self.total_words_count / 100), 2)
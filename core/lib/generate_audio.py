@@ -1,6 +1,7 @@
-import tempfile
-import uuid
-from django.core.files.base import ContentFile
+import hashlib
+import io
+from django.core.files import File
+from django.core.files.storage import default_storage
 from gtts import gTTS
 from core.models import GttsAudio, Word
 
@@ -26,27 +27,37 @@ class GenerateAudio:
 
     def bind_audition_to_word(self, use, text=''):
         if text:
-            # generate mp3 audition file for certain text
-            tts = gTTS(text=text, lang=self.word.studying_lang.name)
+            lang = self.word.studying_lang.name
+            content_key = self.content_key(lang, text)
 
-            # Create a temporary file and save it as new record as GttsAudio model
-            with tempfile.NamedTemporaryFile(suffix=f'.{self.TYPE_OF_FILE}', delete=False) as temp_audio_file:
-                tts.save(temp_audio_file.name)
+            # the same text in the same language is generated only once and its file is shared by all words
+            audio_name = self.shared_audio_name(content_key)
 
-                # Read the content of the temporary file
-                temp_audio_file.seek(0)  # Move the file pointer to the beginning
-                audio_content = temp_audio_file.read()
+            if not audio_name:
+                audio_name = self.generate_audition(text, lang, name=f'{content_key}.{self.TYPE_OF_FILE}')
 
-                # save generated audio to media
-                audio_content = ContentFile(audio_content, name=f'{self.generate_uuid()}.mp3')
-                
-                GttsAudio.objects.create(audio_name=audio_content, word=self.word, use=use)
+            GttsAudio.objects.create(audio_name=audio_name, word=self.word, use=use, content_key=content_key)
 
+    def generate_audition(self, text, lang, name):
+        # generate mp3 audition for certain text and write it straight into memory (without temporary files)
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=lang).write_to_fp(buffer)
+        buffer.seek(0)
 
-    # each audio file should have unique name
-    @staticmethod
-    def generate_uuid():
-        return uuid.uuid4()
+        # it will be saved to the storage as soon as GttsAudio is created
+        return File(buffer, name=name)
 
+    # returns the name of already generated file for the same (lang, text) if it still exists in the storage
+    @staticmethod
+    def shared_audio_name(content_key):
+        audio = GttsAudio.objects.filter(content_key=content_key).exclude(audio_name='').first()
 
+        if audio and default_storage.exists(audio.audio_name.name):
+            return audio.audio_name.name
+        return None
 
+    # the key of generated audio depends only on language and normalized text
+    @staticmethod
+    def content_key(lang, text):
+        normalized_text = ' '.join(text.split()).lower()
+        return hashlib.sha256(f'{lang}:{normalized_text}'.encode()).hexdigest()
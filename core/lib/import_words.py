@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+
+from django.db import transaction
+from django.utils.html import strip_tags
+
+from core.lib.progress_counters import ProgressCounters
+from core.models import Word
+
+
+# this class is used to import many words at once (from json, csv or anki text export).
+# Duplicates are checked by one query per batch and new words are inserted by bulk_create
+class ImportWords:
+    FIELDS = ('word', 'translation', 'sentence')
+    FORMATS = ('json', 'csv', 'anki')
+    BATCH_SIZE = 500
+    MAX_LENGTH = 255
+    MAX_ROWS = 10000
+
+    def __init__(self, user, studying_lang):
+        self.user = user
+        self.studying_lang = studying_lang
+
+    # the words are imported in one transaction, so a failed import doesn't leave a part of the words
+    def perform(self, rows):
+        words, skipped = self.unique_words(rows)
+
+        with transaction.atomic():
+            new_words = []
+            for batch in self.batches(words):
+                existing = self.existing_words([word['word'] for word in batch])
+                new_words += [Word(added_by=self.user, studying_lang=self.studying_lang,
+                                   audio_status=Word.AUDIO_PENDING, **word)
+                              for word in batch if word['word'] not in existing]
+
+            created = Word.objects.bulk_create(new_words, batch_size=self.BATCH_SIZE)
+
+            # bulk_create doesn't send signals, all new words are unknown so only count of words is changed
+            ProgressCounters(self.user.id, self.studying_lang.id).change({'words_count': len(created)})
+
+        return created, skipped + len(words) - len(created)
+
+    # returns valid rows without repeated words and count of skipped rows
+    def unique_words(self, rows):
+        words, seen = [], set()
+
+        for row in rows:
+            word = self.clean(row)
+            if word and word['word'] not in seen:
+                seen.add(word['word'])
+                words.append(word)
+
+        return words, len(rows) - len(words)
+
+    # the same as AddWordForm, a user can't have two words with the same value
+    def existing_words(self, values):
+        return set(Word.objects.filter(added_by=self.user, word__in=values).values_list('word', flat=True))
+
+    def clean(self, row):
+        if isinstance(row, (list, tuple)):
+            row = dict(zip(self.FIELDS, row))
+
+        if not isinstance(row, dict):
+            return None
+
+        word = {field: strip_tags(str(row.get(field) or '')).strip() for field in self.FIELDS}
+
+        if not word['word'] or not word['translation']:
+            return None
+
+        if any(len(value) > self.MAX_LENGTH for value in word.values()):
+            return None
+
+        return word
+
+    @classmethod
+    def batches(cls, items):
+        for start in range(0, len(items), cls.BATCH_SIZE):
+            yield items[start:start + cls.BATCH_SIZE]
+
+    # converts the content of imported file to the list of rows
+    @classmethod
+    def parse(cls, content, file_format='csv'):
+        if file_format not in cls.FORMATS:
+            raise ValueError('Invalid format')
+
+        if file_format == 'json':
+            # words are passed as a list in json body or as json text (in a file or a form field)
+            rows = json.loads(content) if isinstance(content, str) else content
+            if not isinstance(rows, (list, tuple)):
+                raise ValueError('Words must be a list')
+            return list(rows)
+
+        if not isinstance(content, str):
+            raise ValueError('Content must be a text')
+
+        if file_format == 'anki':
+            # anki exports notes as tab separated lines, the lines started with '#' are headers
+            lines = [line for line in content.splitlines() if line.strip() and not line.startswith('#')]
+            return [line.split('\t') for line in lines]
+
+        rows = [row for row in csv.reader(io.StringIO(content)) if row]
+
+        if rows and [value.strip().lower() for value in rows[0][:2]] == ['word', 'translation']:
+            header = [value.strip().lower() for value in rows[0]]
+            return [dict(zip(header, row)) for row in rows[1:]]
+        return rows
@@ -0,0 +1,52 @@
+from django.db.migrations.operations import AddIndex
+from django.db.migrations.operations.base import Operation
+
+
+# this operation of migrations adds the index concurrently (without locking writes to the table) on PostgreSQL
+# and as AddIndex on other databases. The database is checked by the connection which the migration is applied
+# to (not by the default one), so the migration must be non-atomic (atomic = False) on any database
+class AddIndexConcurrentlyOnPostgres(AddIndex):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self.concurrently().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self.concurrently().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def concurrently(self):
+        from django.contrib.postgres.operations import AddIndexConcurrently
+
+        return AddIndexConcurrently(self.model_name, self.index)
+
+
+# this operation of migrations applies the operation only to PostgreSQL databases and doesn't change the state
+# of models, so the models are the same for all databases (for example, trigram indexes of the search of words).
+# Example: PostgresOnly(TrigramExtension())
+class PostgresOnly(Operation):
+    reduces_to_sql = False
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    @property
+    def reversible(self):
+        return self.operation.reversible
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self.operation.database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            self.operation.database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f'{self.operation.describe()} (PostgreSQL only)'
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
+# this class keeps the counters of user's progress (see CalculateUserProgress) in cache by (user, studying_lang).
+# The counters are changed incrementally after saving/deleting words and are recalculated from db as soon as
+# they expire (PROGRESS_COUNTERS_TIMEOUT), so they are periodically reconciled with db.
+# Words are changed by web processes and celery workers, so the counters are used only with a cache shared by
+# all processes (PROGRESS_COUNTERS_ENABLED, redis). With a cache in memory of each process a counter changed by
+# one process would be stale in others, so then the counters are always calculated by "calculate"
+class ProgressCounters:
+    KEYS = ('words_count', 'total', 'studying_to_native', 'native_to_studying')
+
+    def __init__(self, user_id=None, studying_lang_id=None):
+        self.user_id = user_id
+        self.studying_lang_id = studying_lang_id
+
+    def cache_key(self, key):
+        return f'progress_counters:{self.user_id}:{self.studying_lang_id}:{key}'
+
+    def cache_keys(self):
+        return {self.cache_key(key): key for key in self.KEYS}
+
+    @staticmethod
+    def enabled():
+        return getattr(settings, 'PROGRESS_COUNTERS_ENABLED', False)
+
+    @staticmethod
+    def timeout():
+        return getattr(settings, 'PROGRESS_COUNTERS_TIMEOUT', 15 * 60)
+
+    # returns cached counters, if some of them are missing the counters are calculated by "calculate" callable
+    def retrieve(self, calculate):
+        if not self.enabled():
+            return calculate()
+
+        cache_keys = self.cache_keys()
+        cached = cache.get_many(cache_keys)
+
+        if len(cached) == len(cache_keys):
+            return {key: cached[cache_key] for cache_key, key in cache_keys.items()}
+
+        counts = calculate()
+        cache.set_many({cache_key: counts[key] for cache_key, key in cache_keys.items()}, timeout=self.timeout())
+        return counts
+
+    # changes cached counters by deltas, missing counters will be calculated on the next retrieving
+    def change(self, deltas):
+        if not self.enabled():
+            return
+
+        for key, delta in deltas.items():
+            if delta:
+                try:
+                    cache.incr(self.cache_key(key), delta)
+                except ValueError:
+                    pass
+
+    def delete(self):
+        if self.enabled():
+            cache.delete_many(list(self.cache_keys()))
+
+    # how one word with such progress affects the counters
+    @classmethod
+    def contribution(cls, know_native_to_studying=False, know_studying_to_native=False, sign=1):
+        return {
+            'words_count': sign,
+            'total': sign * int(know_native_to_studying and know_studying_to_native),
+            'studying_to_native': sign * int(know_studying_to_native),
+            'native_to_studying': sign * int(know_native_to_studying),
+        }
+
+    @classmethod
+    def deltas(cls, previous, current):
+        return {key: current[key] - previous[key] for key in cls.KEYS}
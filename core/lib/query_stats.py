@@ -0,0 +1,71 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+
+
+# this class collects queries executed by database connections of the current thread while it is used
+# as a context manager: their count, their total time and their shapes (sql without values). Many queries
+# of the same shape usually come from a loop which makes one query per object (N+1).
+# Example:
+# with QueryStats() as stats:
+#     response = view(request)
+# stats.count -> 12, stats.duration -> 0.004 (seconds), stats.duplicates() -> {'SELECT ... WHERE id = %s': 10}
+class QueryStats:
+    # a shape repeated so many times is considered as N+1
+    DUPLICATE_THRESHOLD = 3
+    # queries which are repeated by transactions themselves
+    TRANSACTION_QUERIES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+    # values which are inlined into sql instead of parameters
+    LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+    IN_LISTS = re.compile(r'IN \((?:%s, )*%s\)')
+
+    def __init__(self):
+        self.queries = []
+        self.duration = 0
+        self.shapes = Counter()
+
+    def __enter__(self):
+        self.stack = ExitStack()
+
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *args):
+        self.stack.close()
+
+    # it is called by the connection instead of executing the query (see execute_wrapper)
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add(sql, time.perf_counter() - start)
+
+    def add(self, sql, duration):
+        self.queries.append((sql, duration))
+        self.duration += duration
+
+        if not sql.startswith(self.TRANSACTION_QUERIES):
+            self.shapes[self.shape(sql)] += 1
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    # shapes which are repeated at least threshold times with the count of their queries
+    def duplicates(self, threshold=None):
+        threshold = threshold or self.DUPLICATE_THRESHOLD
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+    def duplicates_count(self, threshold=None):
+        return sum(self.duplicates(threshold).values())
+
+    # lists "IN (%s, %s, ...)" of different lengths have the same shape
+    @classmethod
+    def shape(cls, sql):
+        return cls.IN_LISTS.sub('IN (...)', cls.LITERALS.sub('%s', sql))
@@ -0,0 +1,169 @@
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
+from django.utils import timezone
+
+from core.lib.schedulers import FSRSScheduler, LadderScheduler, Scheduler, SM2Scheduler
+from core.lib.vectorized_reset import VectorizedReset
+
+
+# this class simulates future reviews of words to predict how many cards will be answered per day (globally and
+# per user). The simulation starts from the current progress of words (stage, times_in_row, due_at and the state
+# of schedulers), every due word is reviewed in both directions and every answer is correct with the probability
+# "accuracy" (an incorrect answer is repeated until it is correct, all attempts are counted as the load).
+# Words are loaded by chunks (CHUNK_SIZE) straight into numpy arrays and all due words of the day are simulated
+# at once: words of the ladder by VectorizedReset, words of SM-2 and FSRS by the steps of their schedulers
+# applied to arrays (one step per attempt).
+# Example: forecast = ReviewForecast(Word.objects.all(), days=90).perform(); forecast.peak_load
+class ReviewForecast:
+    DIRECTIONS = 2
+    FIELDS = ('added_by_id', 'added_by__profile__scheduler', 'stage', 'times_in_row', 'due_at', 'ease',
+              'interval', 'stability', 'difficulty', 'reviewed_at')
+    CHUNK_SIZE = 10000
+    # schedulers of words are kept as their positions in SCHEDULERS
+    SCHEDULERS = tuple(Scheduler.all())
+    LADDER, SM2, FSRS = map(SCHEDULERS.index, (LadderScheduler, SM2Scheduler, FSRSScheduler))
+
+    def __init__(self, words, days=90, accuracy=0.9, seed=None, start=None):
+        if not 0 < accuracy <= 1:
+            raise ValueError('accuracy must be in (0, 1]')
+
+        self.words = words
+        self.days = days
+        self.accuracy = accuracy
+        self.random = np.random.default_rng(seed)
+        self.start = start or timezone.now()
+
+    def perform(self):
+        self.load()
+        self.by_user_load = np.zeros((len(self.user_ids), self.days), dtype=np.int64)
+
+        for day in range(self.days):
+            due = np.flatnonzero(self.due_days == day)
+            if not len(due):
+                continue
+
+            attempts = self.attempts(len(due))
+            np.add.at(self.by_user_load[:, day], self.users[due], attempts.sum(axis=1))
+
+            schedulers = self.schedulers[due]
+            self.simulate_ladder(day, due[schedulers == self.LADDER])
+            self.simulate_sm2(day, due[schedulers == self.SM2], attempts[schedulers == self.SM2])
+            self.simulate_fsrs(day, due[schedulers == self.FSRS], attempts[schedulers == self.FSRS])
+        return self
+
+    # every chunk of rows is converted to arrays, so rows of all words aren't kept in memory at once
+    def load(self):
+        rows = self.words.values_list(*self.FIELDS).iterator(chunk_size=self.CHUNK_SIZE)
+        chunks = [self.arrays([])]
+
+        while chunk := list(islice(rows, self.CHUNK_SIZE)):
+            chunks.append(self.arrays(chunk))
+
+        for name in chunks[0]:
+            setattr(self, name, np.concatenate([chunk[name] for chunk in chunks]))
+
+        user_ids, self.users = np.unique(self.user_ids, return_inverse=True)
+        self.user_ids = user_ids.tolist()
+
+    def arrays(self, chunk):
+        (user_ids, schedulers, stages, times_in_row, due_at, ease, interval, stability, difficulty,
+         reviewed_at) = zip(*chunk) if chunk else [()] * len(self.FIELDS)
+        due_days = np.floor(self.days_from_start(due_at))
+
+        return {
+            'user_ids': np.array(user_ids, dtype=np.int64),
+            'schedulers': self.encode_schedulers(schedulers),
+            'stages': VectorizedReset.encode(stages),
+            'times': np.array(times_in_row, dtype=np.int64),
+            # words without due date are in the review queue already
+            'due_days': np.where(np.isnan(due_days), 0, np.maximum(due_days, 0)).astype(np.int64),
+            # words with due_at were answered already, their progress of the ladder is reset as soon as they are due
+            'answered': ~np.isnan(due_days),
+            'ease': np.array(ease, dtype=np.float64),
+            'interval': np.array(interval, dtype=np.int64),
+            # None (never answered) becomes nan
+            'stability': np.array(stability, dtype=np.float64),
+            'difficulty': np.array(difficulty, dtype=np.float64),
+            'reviewed_days': self.days_from_start(reviewed_at),
+        }
+
+    # days from the start of the simulation (nan for None)
+    def days_from_start(self, dates):
+        start = self.start.timestamp()
+        return np.fromiter(((date.timestamp() - start) / 86400 if date else np.nan for date in dates),
+                           dtype=np.float64, count=len(dates))
+
+    # users without a scheduler use the ladder
+    @classmethod
+    def encode_schedulers(cls, names):
+        names = np.array(names, dtype=object)
+        codes = np.full(len(names), cls.LADDER, dtype=np.int64)
+
+        for code, scheduler in enumerate(cls.SCHEDULERS):
+            codes[names == scheduler.NAME] = code
+        return codes
+
+    def simulate_ladder(self, day, due):
+        if not len(due):
+            return
+
+        stages = np.where(self.answered[due], 0, self.stages[due])
+        times = np.where(self.answered[due], 0, self.times[due])
+
+        reset = VectorizedReset.from_indexes(stages, times, np.full(len(due), self.DIRECTIONS))
+        reset.perform()
+        self.stages[due], self.times[due] = reset.stage_indexes, reset.times_in_row
+        self.due_days[due] = day + reset.reset_in_days
+        self.answered[due] = True
+
+    # incorrect attempts of every direction are answered before the correct one, as by one user
+    def simulate_sm2(self, day, due, attempts):
+        for words, correctness in self.answers(due, attempts):
+            self.ease[words], self.interval[words], self.times[words] = SM2Scheduler.step(
+                self.ease[words], self.interval[words], self.times[words], correctness)
+
+        self.due_days[due] = day + self.interval[due]
+
+    def simulate_fsrs(self, day, due, attempts):
+        for words, correctness in self.answers(due, attempts):
+            elapsed_days = np.nan_to_num(day - self.reviewed_days[words])
+            self.stability[words], self.difficulty[words], self.interval[words] = FSRSScheduler.step(
+                self.stability[words], self.difficulty[words], elapsed_days, correctness)
+            self.reviewed_days[words] = day
+
+        self.due_days[due] = day + self.interval[due]
+
+    # yields (words, correctness) for every attempt: the words which make it and whether it is their last attempt
+    @staticmethod
+    def answers(due, attempts):
+        for direction in range(attempts.shape[1]):
+            for attempt in range(int(attempts[:, direction].max(initial=0))):
+                answering = attempts[:, direction] > attempt
+                yield due[answering], attempts[answering, direction] == attempt + 1
+
+    # count of attempts of every direction until the correct answer
+    def attempts(self, count):
+        return self.random.geometric(self.accuracy, size=(count, self.DIRECTIONS))
+
+    @property
+    def daily_load(self):
+        return self.by_user_load.sum(axis=0)
+
+    @property
+    def peak_day(self):
+        return int(self.daily_load.argmax()) if self.days else None
+
+    @property
+    def peak_load(self):
+        return int(self.daily_load.max(initial=0))
+
+    def date(self, day):
+        return (self.start + timedelta(days=day)).date()
+
+    # users with the highest peaks of load: [(user_id, peak_load, peak_day), ..]
+    def top_users(self, count=10):
+        peaks = self.by_user_load.max(axis=1, initial=0)
+        order = np.argsort(-peaks, kind='stable')[:count]
+        return [(self.user_ids[index], int(peaks[index]), int(self.by_user_load[index].argmax())) for index in order]
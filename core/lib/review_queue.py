@@ -0,0 +1,121 @@
+import hashlib
+import random
+from bisect import bisect_right
+from functools import cached_property
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Value
+
+
+# this class is used to go through unknown words of one direction in a pseudo-random order without storing
+# the order in the session. Every word gets the key (id * multiplier + offset) % MODULUS, the multiplier and
+# the offset are generated from the seed, and the next card is the word with the smallest key after the key of
+# the current word. So the whole state of the queue is the seed (passed by links as "?seed=") and the id of
+# the current card.
+# No index can serve the order by the key, so the ids of unknown words are sorted by the database once per
+# seed and kept in cache in pages (REVIEW_QUEUE_TIMEOUT). The next card is found by binary search of the key
+# in the first keys of pages and then in one page, and candidates are checked by one query by primary keys
+# (answered words are skipped). Words which are added after the first card of the seed aren't in the queue.
+# Example: ReviewQueue(words, 'studying_to_native', seed=request.GET.get('seed')).next(word.id)
+class ReviewQueue:
+    DIRECTIONS = ('studying_to_native', 'native_to_studying')
+    # a prime which is greater than any id of word, so the keys of different words are different
+    MODULUS = 2 ** 31 - 1
+    PAGE_SIZE = 500
+    # how many candidates are checked by one query
+    BATCH_SIZE = 20
+
+    def __init__(self, words, direction, seed=None):
+        if direction not in self.DIRECTIONS:
+            raise ValueError('Invalid direction')
+
+        self.words = words.filter(**{f'know_{direction}': False})
+        self.direction = direction
+        self.seed = self.parse_seed(seed)
+
+        generator = random.Random(self.seed)
+        self.multiplier = generator.randrange(1, self.MODULUS)
+        self.offset = generator.randrange(self.MODULUS)
+
+    def key(self, word_id):
+        return (int(word_id) * self.multiplier + self.offset) % self.MODULUS
+
+    def ordered(self):
+        review_key = (F('id') * Value(self.multiplier) + Value(self.offset)) % Value(self.MODULUS)
+        return self.words.alias(review_key=review_key).order_by('review_key')
+
+    # the first card is found by the database, so pages which open a new queue don't sort all words
+    def first(self):
+        return self.ordered().values_list('id', flat=True).first()
+
+    # returns None when the current word is the last one
+    def next(self, current_id):
+        return next(iter(self.upcoming_ids(current_id)), None)
+
+    # returns words of the next cards after the current word (from the beginning if it isn't passed)
+    def upcoming(self, current_id=None, count=1):
+        ids = self.upcoming_ids(current_id, count)
+        words = self.words.in_bulk(ids)
+        return [words[word_id] for word_id in ids if word_id in words]
+
+    def upcoming_ids(self, current_id=None, count=1):
+        bounds = cache.get(self.cache_key('bounds'))
+        if bounds is None:
+            bounds = self.build()
+
+        key = -1 if current_id is None else self.key(current_id)
+        page = max(bisect_right(bounds, key) - 1, 0)
+        found = []
+
+        while page < len(bounds) and len(found) < count:
+            ids = cache.get(self.cache_key(page))
+            if ids is None:
+                # the page is evicted, so the rest is found by the database and the queue is sorted again next time
+                cache.delete(self.cache_key('bounds'))
+                after = self.ordered().filter(review_key__gt=self.key(found[-1]) if found else key)
+                return found + list(after.values_list('id', flat=True)[:count - len(found)])
+
+            candidates = ids[bisect_right(ids, key, key=self.key):]
+            for start in range(0, len(candidates), self.BATCH_SIZE):
+                found += self.unknown(candidates[start:start + self.BATCH_SIZE])
+                if len(found) >= count:
+                    break
+            page += 1
+        return found[:count]
+
+    # ids in the order of candidates which are still unknown
+    def unknown(self, candidates):
+        unknown = set(self.words.filter(id__in=candidates).values_list('id', flat=True))
+        return [word_id for word_id in candidates if word_id in unknown]
+
+    # sorts ids of unknown words by keys and saves them in pages with the first keys of pages (bounds)
+    def build(self):
+        ids = list(self.ordered().values_list('id', flat=True))
+        pages = [ids[start:start + self.PAGE_SIZE] for start in range(0, len(ids), self.PAGE_SIZE)]
+        bounds = [self.key(page[0]) for page in pages]
+
+        values = {self.cache_key(number): page for number, page in enumerate(pages)}
+        values[self.cache_key('bounds')] = bounds
+        cache.set_many(values, timeout=settings.REVIEW_QUEUE_TIMEOUT)
+        return bounds
+
+    def cache_key(self, part):
+        return f'review_queue:{self.digest}:{part}'
+
+    # the queue is identified by the query of its words (the user, the language, the direction) and the seed
+    @cached_property
+    def digest(self):
+        sql, params = self.words.query.sql_with_params()
+        return hashlib.sha1(f'{sql}:{params}:{self.seed}'.encode()).hexdigest()
+
+    @classmethod
+    def parse_seed(cls, seed):
+        try:
+            return int(seed) % cls.MODULUS
+        except (TypeError, ValueError):
+            return cls.new_seed()
+
+    @classmethod
+    def new_seed(cls):
+        return random.randrange(cls.MODULUS)
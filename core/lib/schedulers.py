@@ -0,0 +1,198 @@
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from core.lib.update_word_progress import UpdateWordProgress
+from core.lib.vectorized_reset import VectorizedReset
+
+
+# schedulers calculate when the word should be reviewed again (Word.due_at) after answering it. A scheduler only
+# changes fields of the word (listed in FIELDS) without saving it. The scheduler of the user is chosen in his
+# profile (Profile.scheduler).
+# Example: Scheduler.by_name('sm2').answer(word, correctness=True)
+class Scheduler(ABC):
+    NAME = None
+    # the name of the scheduler in the choices of Profile.scheduler
+    LABEL = None
+    FIELDS = ()
+    # values which are assigned to overdue words by the task 'reset_overdue_words'
+    OVERDUE_VALUES = {'know_native_to_studying': False, 'know_studying_to_native': False, 'due_at': None}
+    # values which are assigned to words of the user who switches to this scheduler, the state of the previous
+    # scheduler means something else (for example, times_in_row of the ladder isn't a count of SM-2 repetitions)
+    INITIAL_VALUES = {}
+
+    @abstractmethod
+    def answer(self, word, correctness, now=None):
+        pass
+
+    # answers is the list of (word, correctness) in the order of answering
+    def answer_many(self, answers, now=None):
+        now = now or timezone.now()
+
+        for word, correctness in answers:
+            self.answer(word, correctness, now)
+
+    # the only list of schedulers: choices of Profile.scheduler and ReviewForecast are built from it
+    @staticmethod
+    def all():
+        return [LadderScheduler, SM2Scheduler, FSRSScheduler]
+
+    @classmethod
+    def choices(cls):
+        return [(scheduler.NAME, scheduler.LABEL) for scheduler in cls.all()]
+
+    @classmethod
+    def by_name(cls, name):
+        for scheduler in cls.all():
+            if scheduler.NAME == name:
+                return scheduler()
+        raise ValueError('Invalid scheduler')
+
+    # due dates are kept, so the words are reviewed when they were planned by the previous scheduler
+    def start(self, words):
+        return words.update(**self.INITIAL_VALUES)
+
+    @classmethod
+    def all_fields(cls):
+        return tuple(dict.fromkeys(field for scheduler in cls.all() for field in scheduler.FIELDS))
+
+
+# the fixed ladder of stages (see CalculateReset): only correct answers move the word up the ladder,
+# the ladder starts from the first stage again when the word is overdue
+class LadderScheduler(Scheduler):
+    NAME = 'ladder'
+    LABEL = 'Stages (day, week, month, three months, half year)'
+    FIELDS = UpdateWordProgress.FIELDS
+    OVERDUE_VALUES = {**Scheduler.OVERDUE_VALUES, 'stage': 'day', 'times_in_row': 0}
+    INITIAL_VALUES = {'times_in_row': 0}
+
+    def answer(self, word, correctness, now=None):
+        if correctness:
+            UpdateWordProgress(word).apply()
+
+    # stages, streaks and due dates of all answered words are calculated at once (see VectorizedReset)
+    def answer_many(self, answers, now=None):
+        correct_answers = Counter()
+        for word, correctness in answers:
+            correct_answers[word] += correctness
+
+        words = list(correct_answers)
+        reset = VectorizedReset([word.stage for word in words], [word.times_in_row for word in words],
+                                [correct_answers[word] for word in words]).perform()
+
+        for word, stage, times_in_row, due_at in zip(words, reset.stages, reset.times_in_row, reset.due_at(now)):
+            if due_at:
+                word.stage, word.times_in_row, word.due_at = str(stage), int(times_in_row), due_at
+
+
+# SuperMemo 2: the interval grows by the ease factor of the word, incorrect answers start it again from one day.
+# times_in_row is the number of repetitions in a row, a word without an interval starts from the first repetition
+class SM2Scheduler(Scheduler):
+    NAME = 'sm2'
+    LABEL = 'SM-2'
+    FIELDS = ('ease', 'interval', 'times_in_row', 'reviewed_at', 'due_at')
+    INITIAL_VALUES = {'ease': 2.5, 'interval': 0, 'times_in_row': 0, 'reviewed_at': None}
+    MIN_EASE = 1.3
+    # answers are binary, so they are mapped to qualities of SM-2 (from 0 to 5)
+    CORRECT_QUALITY, INCORRECT_QUALITY = 4, 1
+
+    def answer(self, word, correctness, now=None):
+        now = now or timezone.now()
+        ease, interval, times_in_row = self.step(word.ease, word.interval, word.times_in_row, correctness)
+
+        word.ease, word.interval, word.times_in_row = float(ease), int(interval), int(times_in_row)
+        word.reviewed_at = now
+        word.due_at = now + timedelta(days=word.interval)
+
+    # the state of the word after one answer, the arguments are values of one word or numpy arrays of values
+    # of many words (see ReviewForecast)
+    @classmethod
+    def step(cls, ease, interval, times_in_row, correctness):
+        quality = np.where(correctness, cls.CORRECT_QUALITY, cls.INCORRECT_QUALITY)
+        repetitions = np.where(np.asarray(interval) >= 1, times_in_row, 0)
+        next_interval = np.select([repetitions == 0, repetitions == 1], [1, 6], np.rint(interval * ease))
+
+        ease = np.maximum(cls.MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        return ease, np.where(correctness, next_interval, 1), np.where(correctness, repetitions + 1, 0)
+
+
+# FSRS (version 4.5) with default weights: the memory of the word is described by stability (the interval in days
+# after which the word is recalled with probability 90%) and difficulty (from 1 to 10). Correct answers are rated
+# as "good" and incorrect ones as "again"
+class FSRSScheduler(Scheduler):
+    NAME = 'fsrs'
+    LABEL = 'FSRS'
+    FIELDS = ('stability', 'difficulty', 'interval', 'reviewed_at', 'due_at')
+    INITIAL_VALUES = {'stability': None, 'difficulty': None, 'interval': 0, 'reviewed_at': None}
+    WEIGHTS = (0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474, 0.1367, 1.0461,
+               2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755)
+    DECAY = -0.5
+    FACTOR = 0.9 ** (1 / DECAY) - 1
+    DESIRED_RETENTION = 0.9
+    MAX_INTERVAL = 36500
+    AGAIN, GOOD = 1, 3
+
+    def answer(self, word, correctness, now=None):
+        now = now or timezone.now()
+        elapsed_days = (now - word.reviewed_at).total_seconds() / 86400 if word.reviewed_at else 0
+        stability, difficulty, interval = self.step(np.nan if word.stability is None else word.stability,
+                                                    np.nan if word.difficulty is None else word.difficulty,
+                                                    elapsed_days, correctness)
+
+        word.stability, word.difficulty, word.interval = float(stability), float(difficulty), int(interval)
+        word.reviewed_at = now
+        word.due_at = now + timedelta(days=word.interval)
+
+    # the state of the word after one answer, the arguments are values of one word or numpy arrays of values
+    # of many words (see ReviewForecast). Stability and difficulty of words which were never answered are nan
+    @classmethod
+    def step(cls, stability, difficulty, elapsed_days, correctness):
+        grade = np.where(correctness, cls.GOOD, cls.AGAIN)
+        retrievability = cls.retrievability(np.maximum(elapsed_days, 0), stability)
+        reviewed = np.where(correctness, cls.recall_stability(difficulty, stability, retrievability),
+                            cls.forget_stability(difficulty, stability, retrievability))
+
+        first = np.isnan(stability)
+        stability = np.where(first, np.take(cls.WEIGHTS, grade - 1), reviewed)
+        difficulty = np.where(first, cls.initial_difficulty(grade), cls.next_difficulty(difficulty, grade))
+        return stability, difficulty, cls.next_interval(stability)
+
+    @classmethod
+    def retrievability(cls, elapsed_days, stability):
+        return (1 + cls.FACTOR * elapsed_days / stability) ** cls.DECAY
+
+    @classmethod
+    def next_interval(cls, stability):
+        interval = stability / cls.FACTOR * (cls.DESIRED_RETENTION ** (1 / cls.DECAY) - 1)
+        return np.clip(np.rint(interval), 1, cls.MAX_INTERVAL).astype(np.int64)
+
+    @classmethod
+    def initial_difficulty(cls, grade):
+        return cls.clamp_difficulty(cls.WEIGHTS[4] - cls.WEIGHTS[5] * (grade - 3))
+
+    @classmethod
+    def next_difficulty(cls, difficulty, grade):
+        w = cls.WEIGHTS
+        # mean reversion to the initial difficulty of "good"
+        return cls.clamp_difficulty(w[7] * w[4] + (1 - w[7]) * (difficulty - w[6] * (grade - 3)))
+
+    @classmethod
+    def recall_stability(cls, difficulty, stability, retrievability):
+        w = cls.WEIGHTS
+        growth = (np.exp(w[8]) * (11 - difficulty) * stability ** -w[9] *
+                  (np.exp((1 - retrievability) * w[10]) - 1))
+        return stability * (1 + growth)
+
+    @classmethod
+    def forget_stability(cls, difficulty, stability, retrievability):
+        w = cls.WEIGHTS
+        new_stability = (w[11] * difficulty ** -w[12] * ((stability + 1) ** w[13] - 1) *
+                         np.exp((1 - retrievability) * w[14]))
+        return np.minimum(new_stability, stability)
+
+    @staticmethod
+    def clamp_difficulty(difficulty):
+        return np.clip(difficulty, 1, 10)
@@ -0,0 +1,46 @@
+from functools import cached_property
+
+from rest_framework.authtoken.models import Token
+
+from core.lib.studying_languages import StudyingLanguages
+
+
+# this class resolves what pages need to know about the studying of the user (the profile, the studying language,
+# other languages and the auth token) once per request: every value is loaded on its first access and reused
+# by the view and all templates. It is created for every request by StudyContextMiddleware (request.study).
+# The user is read on the first access, so the user authenticated by rest framework (by token) is used too
+# Example: request.study.studying_lang -> <StudyingLanguage: en>, request.study.available_languages -> [<bg>]
+class StudyContext:
+    def __init__(self, request):
+        self.request = request
+
+    @cached_property
+    def user(self):
+        user = self.request.user
+        return user if user.is_authenticated else None
+
+    @cached_property
+    def profile(self):
+        return self.user.profile if self.user else None
+
+    # the language is taken from the registry instead of a query by the foreign key
+    @cached_property
+    def studying_lang(self):
+        return StudyingLanguages.by_id(self.profile.studying_lang_id) if self.profile else None
+
+    # languages which the user can switch to
+    @cached_property
+    def available_languages(self):
+        if not self.profile:
+            return []
+        return StudyingLanguages.exclude(self.studying_lang.name if self.studying_lang else None)
+
+    @cached_property
+    def auth_token(self):
+        if not self.user:
+            return None
+
+        try:
+            return self.user.auth_token
+        except Token.DoesNotExist:
+            return None
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+
+
+# this class keeps all studying languages in memory of the process, they are loaded from db by one query and
+# then names, ids and lists of other languages are resolved without queries. The languages are changed
+# only by admins, so the registry is cleared by signals of StudyingLanguage (see core/models.py) in the process
+# which changed them. Other processes reload them after STUDYING_LANGUAGES_TIMEOUT seconds or when a language
+# isn't found (it can be created by another process), but not more often than once per
+# STUDYING_LANGUAGES_MISS_INTERVAL seconds, so lookups of unknown languages don't query the table every time.
+# Example: StudyingLanguages.get('en') -> <StudyingLanguage: en>, StudyingLanguages.exclude('en') -> [<bg>]
+class StudyingLanguages:
+    _languages = None
+    _loaded_at = 0
+    _missed_at = None
+    _lock = threading.Lock()
+
+    # all languages in order of their ids
+    @classmethod
+    def all(cls):
+        languages = cls._languages
+
+        if languages is None or time.monotonic() - cls._loaded_at > cls.timeout():
+            languages = cls.load()
+        return list(languages)
+
+    @classmethod
+    def get(cls, name):
+        return cls.find(lambda language: language.name == name) if name else None
+
+    @classmethod
+    def by_id(cls, id):
+        return cls.find(lambda language: language.id == id) if id is not None else None
+
+    # a missing language is looked for once more in freshly loaded languages, unless they were reloaded
+    # because of another miss less than miss_interval() seconds ago
+    @classmethod
+    def find(cls, condition):
+        language = next(filter(condition, cls.all()), None)
+
+        if language is None and cls.can_reload_on_miss():
+            cls._missed_at = time.monotonic()
+            language = next(filter(condition, cls.load()), None)
+        return language
+
+    @classmethod
+    def can_reload_on_miss(cls):
+        return cls._missed_at is None or time.monotonic() - cls._missed_at > cls.miss_interval()
+
+    @staticmethod
+    def timeout():
+        return getattr(settings, 'STUDYING_LANGUAGES_TIMEOUT', 5 * 60)
+
+    @staticmethod
+    def miss_interval():
+        return getattr(settings, 'STUDYING_LANGUAGES_MISS_INTERVAL', 10)
+
+    # all languages except the language with this name (all languages if the name is None)
+    @classmethod
+    def exclude(cls, name):
+        return [language for language in cls.all() if language.name != name]
+
+    @classmethod
+    def load(cls):
+        with cls._lock:
+            languages = tuple(apps.get_model('core', 'StudyingLanguage').objects.order_by('id'))
+            cls._languages, cls._loaded_at = languages, time.monotonic()
+        return languages
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._languages, cls._missed_at = None, None
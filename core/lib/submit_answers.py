@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from core.lib.progress_counters import ProgressCounters
+from core.lib.review_queue import ReviewQueue
+from core.lib.schedulers import Scheduler
+from core.models import Word
+
+
+# this class applies many answers of exercises at once (for example, answers of a whole offline session).
+# An answer is {"id": <word id>, "direction": "studying_to_native" | "native_to_studying", "correctness": bool},
+# answers to words of other users and invalid answers are skipped. The words are loaded (and locked) by one query
+# and saved by one bulk_update in one transaction
+class SubmitAnswers:
+    MAX_ANSWERS = 500
+    FIELDS = Scheduler.all_fields() + ('know_studying_to_native', 'know_native_to_studying')
+
+    def __init__(self, user):
+        self.user = user
+        # the due dates of answered words are calculated by the scheduler which the user has chosen
+        self.scheduler = Scheduler.by_name(user.profile.scheduler)
+
+    def perform(self, answers):
+        valid = [answer for answer in map(self.clean, answers) if answer]
+
+        # the words are locked until they are saved, so answers sent at the same time (by other devices)
+        # aren't overwritten by progress calculated from stale rows
+        with transaction.atomic():
+            words = Word.objects.select_for_update().filter(added_by=self.user).in_bulk(
+                [answer['id'] for answer in valid])
+
+            applied, scheduled = 0, []
+            for answer in valid:
+                word = words.get(answer['id'])
+                if word:
+                    setattr(word, f'know_{answer["direction"]}', answer['correctness'])
+                    scheduled.append((word, answer['correctness']))
+                    applied += 1
+
+            self.scheduler.answer_many(scheduled)
+            answered = list(words.values())
+            changed = [word for word in answered if word.progress_state() != word._progress_state]
+
+            Word.objects.bulk_update(answered, fields=self.FIELDS, batch_size=self.MAX_ANSWERS)
+            # bulk_update doesn't send post_save, so cached progress counters are changed here
+            self.change_progress_counters(changed)
+
+        return applied, len(answers) - applied
+
+    # the same as answering one card on the exercise page (without saving)
+    def apply(self, word, direction, correctness):
+        self.scheduler.answer(word, correctness)
+        setattr(word, f'know_{direction}', correctness)
+
+    @staticmethod
+    def change_progress_counters(words):
+        deltas = defaultdict(lambda: dict.fromkeys(ProgressCounters.KEYS, 0))
+
+        for word in words:
+            previous, current = word._progress_state, word.progress_state()
+            word_deltas = ProgressCounters.deltas(ProgressCounters.contribution(*previous[2:]),
+                                                  ProgressCounters.contribution(*current[2:]))
+            for key, delta in word_deltas.items():
+                deltas[current[:2]][key] += delta
+
+            word._progress_state = current
+
+        for (user_id, studying_lang_id), counter_deltas in deltas.items():
+            ProgressCounters(user_id, studying_lang_id).change(counter_deltas)
+
+    @staticmethod
+    def clean(answer):
+        if not isinstance(answer, dict) or answer.get('direction') not in ReviewQueue.DIRECTIONS:
+            return None
+
+        if not isinstance(answer.get('id'), int) or not isinstance(answer.get('correctness'), bool):
+            return None
+
+        return {'id': answer['id'], 'direction': answer['direction'], 'correctness': answer['correctness']}
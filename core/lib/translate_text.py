@@ -1,18 +1,167 @@
+import hashlib
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
 from googletrans import Translator
 from httpcore._exceptions import ConnectError
 
 
 class TranslateText:
+    # texts of batch translation are joined by SEPARATOR, the upstream service accepts up to 5000 characters
+    SEPARATOR = '\n'
+    MAX_BATCH_LENGTH = 4500
+
+    # translations are cached in two tiers: in process (LRU with TTL, see local_cache) and in django cache backend
+    _local_cache = None
+    _local_cache_lock = threading.Lock()
+
+    # one translator (and its pooled http client) is shared by all requests of the worker
+    _translator = None
+    _translator_lock = threading.Lock()
+
     # source_lang ("ru", "en", "es", "fr", "de", "ja")
     # target_lang ("ru", "en", "es", "fr", "de", "ja")
     def __init__(self, source_lang, target_lang):
         self.source_lang = source_lang
         self.target_lang = target_lang
-        self.translator = Translator()
+        self.translator = self.shared_translator()
 
     def perform(self, text=''):
         if text and isinstance(text, str):
-            try:
-                return self.translator.translate(text, src=self.source_lang, dest=self.target_lang).text
-            except ConnectError as e:
-                return ''
+            key = self.cache_key(text)
+
+            translation = self.cached(key)
+            if translation:
+                return translation
+
+            translation = self.translate(self.normalize(text))
+
+            if translation:
+                self.remember(key, translation)
+            return translation
+
+    # translates many texts in as few upstream requests as possible, the results are in the same order as texts
+    def perform_many(self, texts=()):
+        translations = [None] * len(texts)
+        # normalized text -> positions of this text in texts, they aren't cached yet
+        missing = {}
+
+        for index, text in enumerate(texts):
+            if not isinstance(text, str) or not text.strip():
+                continue
+
+            translation = self.cached(self.cache_key(text))
+            if translation:
+                translations[index] = translation
+            else:
+                missing.setdefault(self.normalize(text), []).append(index)
+
+        for batch in self.batches(list(missing)):
+            for text, translation in zip(batch, self.translate_batch(batch)):
+                if translation:
+                    self.remember(self.cache_key(text), translation)
+
+                for index in missing[text]:
+                    translations[index] = translation
+
+        return translations
+
+    def translate(self, text):
+        try:
+            return self.translator.translate(text, src=self.source_lang, dest=self.target_lang).text
+        except ConnectError as e:
+            return ''
+
+    # texts are joined by new lines and translated by one request, if the upstream service merges or splits
+    # the lines the texts are translated one by one
+    def translate_batch(self, texts):
+        if len(texts) == 1:
+            return [self.translate(texts[0])]
+
+        translated = self.translate(self.SEPARATOR.join(texts))
+        if not translated:
+            return [''] * len(texts)
+
+        parts = translated.split(self.SEPARATOR)
+        if len(parts) == len(texts):
+            return [part.strip() for part in parts]
+
+        return [self.translate(text) for text in texts]
+
+    # splits texts into batches which don't exceed the limit of characters of one upstream request
+    @classmethod
+    def batches(cls, texts):
+        batch, length = [], 0
+
+        for text in texts:
+            if batch and length + len(cls.SEPARATOR) + len(text) > cls.MAX_BATCH_LENGTH:
+                yield batch
+                batch, length = [], 0
+
+            length += len(text) + (len(cls.SEPARATOR) if batch else 0)
+            batch.append(text)
+
+        if batch:
+            yield batch
+
+    def cached(self, key):
+        local_cache = self.local_cache()
+
+        with self._local_cache_lock:
+            translation = local_cache.get(key)
+
+        if translation is None:
+            translation = cache.get(key)
+
+            if translation is not None:
+                with self._local_cache_lock:
+                    local_cache[key] = translation
+        return translation
+
+    def remember(self, key, translation):
+        local_cache = self.local_cache()
+
+        with self._local_cache_lock:
+            local_cache[key] = translation
+        cache.set(key, translation, timeout=self.timeout())
+
+    def cache_key(self, text):
+        text_hash = hashlib.sha256(self.normalize(text).encode()).hexdigest()
+        return f'translation:{self.source_lang}:{self.target_lang}:{text_hash}'
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(text.split())
+
+    @classmethod
+    def shared_translator(cls):
+        if cls._translator is None:
+            with cls._translator_lock:
+                if cls._translator is None:
+                    cls._translator = Translator()
+        return cls._translator
+
+    # the cache is created on the first use and again if its settings are changed
+    @classmethod
+    def local_cache(cls):
+        size, timeout = cls.local_cache_size(), cls.timeout()
+
+        with cls._local_cache_lock:
+            if cls._local_cache is None or (cls._local_cache.maxsize, cls._local_cache.ttl) != (size, timeout):
+                cls._local_cache = TTLCache(maxsize=size, ttl=timeout)
+            return cls._local_cache
+
+    @staticmethod
+    def timeout():
+        return getattr(settings, 'TRANSLATION_CACHE_TIMEOUT', 7 * 24 * 60 * 60)
+
+    @staticmethod
+    def local_cache_size():
+        return getattr(settings, 'TRANSLATION_LOCAL_CACHE_SIZE', 4096)
+
+    @classmethod
+    def clear_local_cache(cls):
+        with cls._local_cache_lock:
+            cls._local_cache = None
@@ -1,22 +1,26 @@
+from datetime import timedelta
+from django.utils import timezone
 from core.lib.calculate_reset import CalculateReset
-from core.tasks import reset_word_progress
 
 
 class UpdateWordProgress:
     def __init__(self, word):
         self._word = word
 
+    FIELDS = ('stage', 'times_in_row', 'due_at')
+
     def perform(self):
+        self.apply()
+        self._word.save()
+
+    # changes the progress of the word without saving, it is used to save many words by one query
+    def apply(self):
         cr = CalculateReset(self._word.stage, self._word.times_in_row).perform()
         self._word.stage = cr.stage
         self._word.times_in_row = cr.times_in_row
-        self._word.save()
-        
-        self.add_task(cr.reset_in_days)
-
-
-    def add_task(self, days):
-        # for test purposes we set 100 seconds for first run
-        reset_word_progress.apply_async((self._word.pk,), countdown=days * 24 * 60 * 60)
-        # reset_word_progress.apply_async((self._word.pk,), countdown=days * 60)
+        self._word.due_at = self.calculate_due_at(cr.reset_in_days)
 
+    # the progress of the word will be reset by the periodic task 'reset_overdue_words' after this moment
+    @staticmethod
+    def calculate_due_at(days):
+        return timezone.now() + timedelta(days=days)
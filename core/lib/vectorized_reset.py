@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from core.lib.calculate_reset import CalculateReset
+
+
+# this class does the same as CalculateReset, but for arrays of words at once (by numpy).
+# correct_answers is the count of correct answers of every word (an array of booleans works too), CalculateReset
+# is applied to the word as many times as it was answered correctly, the words without correct answers aren't changed.
+# Example:
+# reset = VectorizedReset(['day', 'week'], [3, 0], [True, True]).perform()
+# reset.stages -> ['week', 'week'], reset.times_in_row -> [0, 1], reset.reset_in_days -> [7, 7]
+class VectorizedReset:
+    STAGES = np.array(list(CalculateReset.STAGES))
+    DAYS = np.array(list(CalculateReset.STAGES.values()))
+    # a stage is changed to the next one after so many correct answers in a row
+    TIMES_TO_PROMOTE = 3
+
+    def __init__(self, stages, times_in_row, correct_answers=None):
+        self.stage_indexes = self.encode(stages)
+        self.times = np.asarray(times_in_row, dtype=np.int64).copy()
+
+        if correct_answers is None:
+            correct_answers = np.ones(len(self.times), dtype=np.int64)
+        self.correct_answers = np.asarray(correct_answers, dtype=np.int64)
+
+        if not len(self.stage_indexes) == len(self.times) == len(self.correct_answers):
+            raise ValueError('Arrays must have the same length')
+
+    # stages are passed as positions in STAGES, it is used by simulations to avoid converting names
+    @classmethod
+    def from_indexes(cls, stage_indexes, times_in_row, correct_answers):
+        reset = cls([], [], [])
+        reset.stage_indexes = np.asarray(stage_indexes, dtype=np.int64)
+        reset.times = np.asarray(times_in_row, dtype=np.int64).copy()
+        reset.correct_answers = np.asarray(correct_answers, dtype=np.int64)
+        return reset
+
+    def perform(self):
+        last_stage = len(self.STAGES) - 1
+
+        # every round applies one correct answer to the words which still have answers
+        for answer in range(int(self.correct_answers.max(initial=0))):
+            answered = self.correct_answers > answer
+            promoted = answered & (self.times >= self.TIMES_TO_PROMOTE) & (self.stage_indexes != last_stage)
+
+            self.stage_indexes = np.where(promoted, self.stage_indexes + 1, self.stage_indexes)
+            self.times = np.where(promoted, 0, np.where(answered, self.times + 1, self.times))
+        return self
+
+    @property
+    def stages(self):
+        return self.STAGES[self.stage_indexes]
+
+    @property
+    def times_in_row(self):
+        return self.times
+
+    @property
+    def reset_in_days(self):
+        return self.DAYS[self.stage_indexes]
+
+    # the same as UpdateWordProgress.calculate_due_at for every word, None for words without correct answers
+    def due_at(self, now=None):
+        now = now or timezone.now()
+        return [now + timedelta(days=int(days)) if answers else None
+                for days, answers in zip(self.reset_in_days, self.correct_answers)]
+
+    @classmethod
+    def encode(cls, stages):
+        # names of stages are converted to their positions in STAGES once per unique name
+        names, inverse = np.unique(np.asarray(stages, dtype=str), return_inverse=True)
+        positions = {stage: index for index, stage in enumerate(cls.STAGES)}
+
+        try:
+            indexes = np.array([positions[name] for name in names], dtype=np.int64)
+        except KeyError:
+            raise ValueError('Invalid stage')
+        return indexes[inverse.reshape(-1)]
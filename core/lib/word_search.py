@@ -0,0 +1,175 @@
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Greatest, Round, Upper
+from django.utils.module_loading import import_string
+
+
+# this class searches words by a common query (the parameter "q" of /api/words/) with LIKE '%query%'.
+# Results are ranked: exact matches first, then prefix matches, substring matches and fuzzy matches
+# (only backends which support fuzzy matching find them). It is the fallback for any database.
+class ContainsSearch:
+    FIELDS = ('word', 'translation')
+    EXACT, PREFIX, CONTAINS, FUZZY = 3, 2, 1, 0
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def perform(self, query):
+        query = ' '.join(query.split())
+
+        if not query:
+            return self.queryset
+
+        queryset = self.queryset.filter(self.matches(query)).annotate(**self.annotations(query))
+        # the rank goes first, the previous ordering of queryset is kept for words with the same rank
+        return queryset.order_by(*self.ordering(), *self.queryset.query.order_by, 'id')
+
+    def matches(self, query):
+        return self.any_field('icontains', query)
+
+    def annotations(self, query):
+        return {'search_rank': self.rank(query)}
+
+    def ordering(self):
+        return ['-search_rank']
+
+    def rank(self, query):
+        whens = []
+        for lookup, rank in (('iexact', self.EXACT), ('istartswith', self.PREFIX), ('icontains', self.CONTAINS)):
+            whens += [When(**{f'{field}__{lookup}': query}, then=Value(rank)) for field in self.FIELDS]
+
+        return Case(*whens, default=Value(self.FUZZY), output_field=IntegerField())
+
+    def any_field(self, lookup, query):
+        condition = Q()
+        for field in self.FIELDS:
+            condition |= Q(**{f'{field}__{lookup}': query})
+        return condition
+
+    # creates database objects which the backend needs (they aren't models), it is called after migrate
+    @classmethod
+    def install(cls, connection):
+        pass
+
+
+# this class uses pg_trgm on production: LIKE '%query%' is served by GIN trigram indexes on UPPER(word) and
+# UPPER(translation), fuzzy matches are found by the trigram similarity operator (%) with the same indexes
+# and are ranked by their similarity. The extension and the indexes are created by the migration 0021.
+# The lookups of trigrams need django.contrib.postgres in INSTALLED_APPS
+class PostgresTrigramSearch(ContainsSearch):
+    SIMILARITY_SCALE = 10000
+
+    def matches(self, query):
+        condition = super().matches(query)
+        for field in self.FIELDS:
+            condition |= Q(**{f'{field}_upper__trigram_similar': query.upper()})
+        return condition
+
+    def perform(self, query):
+        self.queryset = self.queryset.alias(**{f'{field}_upper': Upper(field) for field in self.FIELDS})
+        return super().perform(query)
+
+    # similarity() is float4, which isn't kept exactly by the cursor of pagination (json and float8 parameters),
+    # so words with equal similarities could be repeated or skipped between pages. It is kept as an integer
+    # (multiplied by SIMILARITY_SCALE)
+    def annotations(self, query):
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        similarities = [TrigramSimilarity(f'{field}_upper', query.upper()) for field in self.FIELDS]
+        similarity = Cast(Round(Greatest(*similarities) * Value(self.SIMILARITY_SCALE)), IntegerField())
+        return {**super().annotations(query), 'search_similarity': similarity}
+
+    def ordering(self):
+        return ['-search_rank', '-search_similarity']
+
+
+# this class is used locally: words are indexed by the FTS5 table core_word_fts with the trigram tokenizer,
+# which is kept in sync with core_word by triggers. Queries shorter than a trigram are searched by LIKE.
+# A word with one typo still contains one of the halves of the query, so queries of 6 and more characters
+# also find fuzzy matches by the halves
+class SqliteFtsSearch(ContainsSearch):
+    TABLE = 'core_word_fts'
+    MIN_LENGTH = 3
+    MIN_FUZZY_LENGTH = 2 * MIN_LENGTH
+
+    def matches(self, query):
+        if len(query) < self.MIN_LENGTH or not self.is_installed(connections[self.queryset.db]):
+            return super().matches(query)
+
+        fts_query = ' OR '.join(self.phrase(term) for term in self.terms(query))
+        return Q(id__in=RawSQL(f'SELECT rowid FROM {self.TABLE} WHERE {self.TABLE} MATCH %s', (fts_query,)))
+
+    @classmethod
+    def terms(cls, query):
+        if len(query) < cls.MIN_FUZZY_LENGTH:
+            return [query]
+
+        middle = len(query) // 2
+        return [query, query[:middle], query[middle:]]
+
+    @staticmethod
+    def phrase(term):
+        return '"' + term.replace('"', '""') + '"'
+
+    @classmethod
+    def is_installed(cls, connection):
+        return cls.TABLE in connection.introspection.table_names()
+
+    # the table and the triggers are (re)created after every migrate, because sqlite rebuilds core_word
+    # (and drops its triggers) when a migration alters it. If sqlite is built without fts5 words are searched by LIKE
+    @classmethod
+    def install(cls, connection):
+        try:
+            cls.create_index(connection)
+        except OperationalError:
+            pass
+
+    @classmethod
+    def create_index(cls, connection):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                           (f'{cls.TABLE}_%',))
+            if len(cursor.fetchall()) == 3:
+                return
+
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {cls.TABLE} USING fts5(word, translation, "
+                           f"content='core_word', content_rowid='id', tokenize='trigram')")
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {cls.TABLE}_insert AFTER INSERT ON core_word BEGIN "
+                           f"INSERT INTO {cls.TABLE}(rowid, word, translation) "
+                           f"VALUES (new.id, new.word, new.translation); END")
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {cls.TABLE}_delete AFTER DELETE ON core_word BEGIN "
+                           f"INSERT INTO {cls.TABLE}({cls.TABLE}, rowid, word, translation) "
+                           f"VALUES ('delete', old.id, old.word, old.translation); END")
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {cls.TABLE}_update AFTER UPDATE OF word, translation "
+                           f"ON core_word BEGIN "
+                           f"INSERT INTO {cls.TABLE}({cls.TABLE}, rowid, word, translation) "
+                           f"VALUES ('delete', old.id, old.word, old.translation); "
+                           f"INSERT INTO {cls.TABLE}(rowid, word, translation) "
+                           f"VALUES (new.id, new.word, new.translation); END")
+            cursor.execute(f"INSERT INTO {cls.TABLE}({cls.TABLE}) VALUES ('rebuild')")
+
+
+# this class chooses the search backend by the database vendor, the backend can be set explicitly by
+# settings.WORD_SEARCH_BACKEND (a dotted path to the class).
+# Example: WordSearch(user.word_set.all()).perform('smalpox')
+class WordSearch:
+    BACKENDS = {
+        'postgresql': PostgresTrigramSearch,
+        'sqlite': SqliteFtsSearch,
+    }
+
+    def __init__(self, queryset):
+        self.backend = self.backend_class(queryset.db)(queryset)
+
+    def perform(self, query=''):
+        return self.backend.perform(query)
+
+    @classmethod
+    def backend_class(cls, using='default'):
+        path = getattr(settings, 'WORD_SEARCH_BACKEND', None)
+
+        if path:
+            return import_string(path)
+        return cls.BACKENDS.get(connections[using].vendor, ContainsSearch)
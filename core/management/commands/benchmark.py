@@ -0,0 +1,87 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.lib.benchmark import Benchmark
+from core.lib.benchmark_data import BenchmarkData
+
+
+# this command generates users with 10, 1k and 100k words (see BenchmarkData), measures response times of
+# the main pages and api for every user (see Benchmark) and writes them to a json file. A previous json can be
+# passed by --compare to find regressions, so run it on the same machine and database (SQLite or Postgres)
+# before and after a change. It writes to the configured database, so it isn't run in production mode.
+# Example:
+# python manage.py benchmark --output baseline.json
+# python manage.py benchmark --output current.json --compare baseline.json
+class Command(BaseCommand):
+    help = 'Generate benchmark users and measure response times of pages and api'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000],
+                            help='counts of words of generated users')
+        parser.add_argument('--repeat', type=int, default=5, help='how many times every request is measured')
+        parser.add_argument('--seed', type=int, default=0, help='seed of the generated words')
+        parser.add_argument('--output', default='benchmark.json', help='json file with results')
+        parser.add_argument('--compare', help='json file with results of a previous run (the baseline)')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='how much slower than the baseline is a regression (0.2 is 20%%)')
+
+    def handle(self, *args, **kwargs):
+        if settings.PRODUCTION_MODE:
+            raise CommandError('Benchmarks are not run in production mode')
+
+        baseline = self.read_baseline(kwargs['compare']) if kwargs['compare'] else None
+
+        users = BenchmarkData(kwargs['sizes'], seed=kwargs['seed']).perform()
+        results = {}
+
+        for size, user in zip(kwargs['sizes'], users):
+            self.stdout.write(self.style.SUCCESS(f'{size} words:'))
+
+            try:
+                results[str(size)] = Benchmark(user, repeat=kwargs['repeat']).perform()
+            except ValueError as e:
+                raise CommandError(e)
+
+            for name, stats in results[str(size)].items():
+                self.stdout.write(f'{name}: {stats["median_ms"]} ms ({stats["min_ms"]}-{stats["max_ms"]}), '
+                                  f'{stats["queries"]} queries')
+
+        with open(kwargs['output'], 'w') as file:
+            json.dump({
+                'database': connection.vendor,
+                'created_at': timezone.now().isoformat(),
+                'repeat': kwargs['repeat'],
+                'seed': kwargs['seed'],
+                'results': results,
+            }, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Results are written to {kwargs["output"]}'))
+
+        if baseline:
+            self.compare(baseline, results, kwargs['tolerance'])
+
+    @staticmethod
+    def read_baseline(path):
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Invalid baseline: {e}')
+
+    def compare(self, baseline, results, tolerance):
+        if baseline.get('database') != connection.vendor:
+            self.stdout.write(self.style.WARNING(f'The baseline was measured on {baseline.get("database")}'))
+
+        regressions = Benchmark.regressions(baseline.get('results', {}), results, tolerance)
+
+        for size, name, previous, current in regressions:
+            self.stdout.write(self.style.ERROR(
+                f'{name} ({size} words): {previous["median_ms"]} -> {current["median_ms"]} ms, '
+                f'{previous["queries"]} -> {current["queries"]} queries'))
+
+        if regressions:
+            raise CommandError(f'{len(regressions)} regressions in comparison with the baseline')
+        self.stdout.write(self.style.SUCCESS('No regressions in comparison with the baseline'))
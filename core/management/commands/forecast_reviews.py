@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.lib.review_forecast import ReviewForecast
+from core.models import Word
+
+
+# this command predicts how many cards will be answered per day (see ReviewForecast) and reports the peak load,
+# it is used to size celery workers and the database.
+# Example: python manage.py forecast_reviews --days 180 --accuracy 0.85 --username pasha
+class Command(BaseCommand):
+    help = 'Simulate future reviews of words and report the daily and the peak review load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='how many days are simulated')
+        parser.add_argument('--accuracy', type=float, default=0.9, help='probability of a correct answer')
+        parser.add_argument('--seed', type=int, help='seed of the random generator to repeat the simulation')
+        parser.add_argument('--username', help='simulate only words of this user')
+        parser.add_argument('--top', type=int, default=10, help='how many users with the highest peaks are shown')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['days'] <= 0:
+            raise CommandError('--days must be positive')
+
+        words = Word.objects.all()
+        if kwargs['username']:
+            words = words.filter(added_by__username=kwargs['username'])
+
+        try:
+            forecast = ReviewForecast(words, days=kwargs['days'], accuracy=kwargs['accuracy'],
+                                      seed=kwargs['seed']).perform()
+        except ValueError as e:
+            raise CommandError(e)
+
+        self.stdout.write(self.style.SUCCESS('Daily review load:'))
+        for day, load in enumerate(forecast.daily_load):
+            self.stdout.write(f'{forecast.date(day)}: {load}')
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f'Peak review load: {forecast.peak_load} on {forecast.date(forecast.peak_day)}'))
+
+        self.stdout.write(self.style.WARNING('Users with the highest peaks:'))
+        for user_id, peak_load, peak_day in forecast.top_users(kwargs['top']):
+            self.stdout.write(f'user {user_id}: {peak_load} on {forecast.date(peak_day)}')
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from core.lib.review_queue import ReviewQueue
+from core.models import Word
+
+
+# this command prints query plans of the hot queries of Word (word list, api, exercises and review queue)
+# with and without the composite indexes from Word.Meta.indexes. The plans without them are built after dropping
+# only these indexes inside a transaction which is rolled back, so other indexes (of foreign keys) are used as
+# before adding them. DROP INDEX locks the table of words until the rollback, so the command runs only with DEBUG
+# (on PostgreSQL it gives up if the lock isn't taken in LOCK_TIMEOUT instead of blocking other queries).
+# Example: python manage.py word_query_plans --username pasha
+class Command(BaseCommand):
+    help = 'Show query plans of hot Word queries before and after adding composite indexes'
+    LOCK_TIMEOUT = '1s'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='user whose words are queried (by default the user with most words)')
+
+    def handle(self, *args, **kwargs):
+        if not settings.DEBUG:
+            raise CommandError('Indexes are dropped to show plans without them, so the command runs only with DEBUG')
+
+        user = self.retrieve_user(kwargs.get('username'))
+
+        with transaction.atomic():
+            self.drop_indexes()
+            self.print_plans('without composite indexes', user)
+            transaction.set_rollback(True)
+
+        self.print_plans('with composite indexes', user)
+
+    def retrieve_user(self, username=None):
+        if username:
+            user = User.objects.filter(username=username).first()
+        else:
+            user = User.objects.annotate(words_count=Count('word')).order_by('-words_count').first()
+
+        if not user:
+            raise CommandError('User is not found')
+        return user
+
+    @classmethod
+    def drop_indexes(cls):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f"SET LOCAL lock_timeout = '{cls.LOCK_TIMEOUT}'")
+
+            for index in Word._meta.indexes:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+
+    @staticmethod
+    def hot_queries(user):
+        studying_lang = user.profile.studying_lang
+        words = Word.objects.filter(added_by=user, studying_lang=studying_lang)
+
+        return {
+            'WordListView': words.order_by('know_studying_to_native', 'know_native_to_studying'),
+            'WordViewSet': words.order_by('know_native_to_studying', 'know_studying_to_native', 'id')[:5],
+            'ExercisesPageView (studying_to_native)': words.filter(know_studying_to_native=False).order_by('id')[:1],
+            'ExercisesPageView (native_to_studying)': words.filter(know_native_to_studying=False).order_by('id')[:1],
+            'ReviewQueue (native_to_studying)': ReviewQueue(words, 'native_to_studying', seed=0).ordered()[:1],
+        }
+
+    def print_plans(self, title, user):
+        self.stdout.write(self.style.SUCCESS(f'Query plans {title}:'))
+
+        for name, queryset in self.hot_queries(user).items():
+            self.stdout.write(self.style.WARNING(name))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
@@ -0,0 +1,51 @@
+import logging
+
+from django.conf import settings
+
+from core.lib.query_stats import QueryStats
+from core.lib.study_context import StudyContext
+
+
+logger = logging.getLogger(__name__)
+
+
+# this middleware counts queries of every request and their time. The numbers are logged and with DEBUG
+# (or QUERY_COUNT_HEADERS) they are sent in the headers X-DB-Query-Count, X-DB-Time (milliseconds) and
+# X-DB-Duplicate-Queries (queries of shapes repeated QUERY_DUPLICATE_THRESHOLD times or more, N+1). Requests with
+# N+1 are logged as warnings with their repeated shapes. The stats are kept in request.query_stats, tests use them
+# to assert budgets of queries
+class QueryCountMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryStats() as stats:
+            response = self.get_response(request)
+
+        request.query_stats = stats
+        duplicates = stats.duplicates(settings.QUERY_DUPLICATE_THRESHOLD)
+        duplicates_count = sum(duplicates.values())
+
+        # the headers would show the internals of the database to anybody, so they are sent only on demand
+        if settings.DEBUG or getattr(settings, 'QUERY_COUNT_HEADERS', False):
+            response['X-DB-Query-Count'] = stats.count
+            response['X-DB-Time'] = f'{stats.duration * 1000:.1f}'
+            response['X-DB-Duplicate-Queries'] = duplicates_count
+
+        logger.info('%s %s %s: %s queries in %.1f ms, %s duplicates', request.method, request.path,
+                    response.status_code, stats.count, stats.duration * 1000, duplicates_count)
+
+        for shape, count in duplicates.items():
+            logger.warning('N+1 in %s %s: %s queries of %s', request.method, request.path, count, shape)
+        return response
+
+
+# this middleware gives every request its StudyContext (request.study), so the profile, the studying language,
+# other languages and the auth token of the user are loaded once per request
+class StudyContextMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.study = StudyContext(request)
+        return self.get_response(request)
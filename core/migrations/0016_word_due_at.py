@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_rename_correct_count_word_times_in_row'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='due_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_word_due_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='audio_status',
+            field=models.CharField(choices=[('pending', 'pending'), ('ready', 'ready'), ('failed', 'failed')], default='ready', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_word_audio_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gttsaudio',
+            name='content_key',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
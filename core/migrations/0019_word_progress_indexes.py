@@ -0,0 +1,34 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+from core.lib.postgres_operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+    # on PostgreSQL the indexes are built without locking writes to the table of words, which can't be done
+    # inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0018_gttsaudio_content_key'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='word',
+            index=models.Index(fields=['added_by', 'studying_lang', 'know_native_to_studying', 'know_studying_to_native', 'id'], name='word_user_lang_n2s_s2n_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='word',
+            index=models.Index(fields=['added_by', 'studying_lang', 'know_studying_to_native', 'know_native_to_studying', 'id'], name='word_user_lang_s2n_n2s_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='word',
+            index=models.Index(condition=models.Q(('know_studying_to_native', False)), fields=['added_by', 'studying_lang', 'id'], name='word_unknown_s2n_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='word',
+            index=models.Index(condition=models.Q(('know_native_to_studying', False)), fields=['added_by', 'studying_lang', 'id'], name='word_unknown_n2s_idx'),
+        ),
+    ]
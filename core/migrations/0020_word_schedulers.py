@@ -0,0 +1,43 @@
+# Generated by Django 4.2.1 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_word_progress_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='scheduler',
+            field=models.CharField(choices=[('ladder', 'Stages (day, week, month, three months, half year)'), ('sm2', 'SM-2'), ('fsrs', 'FSRS')], default='ladder', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='difficulty',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='ease',
+            field=models.FloatField(default=2.5),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='interval',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='reviewed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='stability',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
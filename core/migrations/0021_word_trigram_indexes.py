@@ -0,0 +1,27 @@
+# Generated by Django 4.2.1 on 2026-10-18 14:05
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+from django.db.models.functions import Upper
+
+from core.lib.postgres_operations import PostgresOnly
+
+
+class Migration(migrations.Migration):
+    # the indexes are built without locking writes to the table of words, which can't be done inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0020_word_schedulers'),
+    ]
+
+    # the extension pg_trgm and GIN trigram indexes on UPPER(word) and UPPER(translation) serve the search of words
+    # on PostgreSQL (see PostgresTrigramSearch), other databases don't need them
+    operations = [
+        PostgresOnly(TrigramExtension()),
+        PostgresOnly(AddIndexConcurrently(
+            'word', GinIndex(OpClass(Upper('word'), name='gin_trgm_ops'), name='word_word_trgm_idx'))),
+        PostgresOnly(AddIndexConcurrently(
+            'word', GinIndex(OpClass(Upper('translation'), name='gin_trgm_ops'), name='word_translation_trgm_idx'))),
+    ]
@@ -1,14 +1,19 @@
 import os.path
 
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Q
 from django.contrib.auth.models import User
 
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 from core.lib.audio_file_path import AudioFilePath
+from core.lib.progress_counters import ProgressCounters
 from core.lib.remove_file import RemoveFile
+from core.lib.schedulers import Scheduler
+from core.lib.studying_languages import StudyingLanguages
+from core.lib.word_search import WordSearch
 # please, uncomment line below when use Goolge Cloud Storage
 # from core.lib.remove_from_gcs import RemoveFromGcs
 from language_cards import settings
@@ -19,6 +24,9 @@ STUDYING_LANGUAGES = [
     ('bg', 'Bulgarian'),
 ]
 
+# algorithms which calculate when words should be reviewed again (see core/lib/schedulers.py)
+SCHEDULERS = Scheduler.choices()
+
 
 #  validate if the value is empty
 def empty_validator(value: str):
@@ -51,48 +59,98 @@ class Word(models.Model):
     studying_lang = models.ForeignKey(StudyingLanguage, on_delete=models.CASCADE)
     stage = models.CharField(max_length=100, default='day')
     times_in_row = models.PositiveIntegerField(default=0)
+    # the moment when the word's progress should be reset (see 'reset_overdue_words' task)
+    due_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # the state of SM-2 (ease, interval) and FSRS (stability, difficulty, interval) schedulers
+    ease = models.FloatField(default=2.5)
+    interval = models.FloatField(default=0)
+    stability = models.FloatField(null=True, blank=True)
+    difficulty = models.FloatField(null=True, blank=True)
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    # audios are generated by the 'generate_word_audio' task, so while it is running the word is 'pending'
+    AUDIO_PENDING, AUDIO_READY, AUDIO_FAILED = 'pending', 'ready', 'failed'
+    AUDIO_STATUS_CHOICES = [(AUDIO_PENDING, 'pending'), (AUDIO_READY, 'ready'), (AUDIO_FAILED, 'failed')]
+    audio_status = models.CharField(max_length=20, choices=AUDIO_STATUS_CHOICES, default=AUDIO_READY)
+
+    # values which are assigned to the word when its progress is reset
+    RESET_VALUES = {
+        'know_native_to_studying': False,
+        'know_studying_to_native': False,
+        'stage': 'day',
+        'times_in_row': 0,
+        'due_at': None,
+        'ease': 2.5,
+        'interval': 0,
+        'stability': None,
+        'difficulty': None,
+        'reviewed_at': None,
+    }
+
+    class Meta:
+        # almost all queries filter user's words by (added_by, studying_lang) and then by/order by progress flags
+        indexes = [
+            models.Index(fields=['added_by', 'studying_lang', 'know_native_to_studying',
+                                 'know_studying_to_native', 'id'], name='word_user_lang_n2s_s2n_idx'),
+            models.Index(fields=['added_by', 'studying_lang', 'know_studying_to_native',
+                                 'know_native_to_studying', 'id'], name='word_user_lang_s2n_n2s_idx'),
+            # words which should be trained in exercises
+            models.Index(fields=['added_by', 'studying_lang', 'id'], condition=Q(know_studying_to_native=False),
+                         name='word_unknown_s2n_idx'),
+            models.Index(fields=['added_by', 'studying_lang', 'id'], condition=Q(know_native_to_studying=False),
+                         name='word_unknown_n2s_idx'),
+        ]
 
     def __str__(self):
         return self.word
 
     def reset_progress(self):
-        self.know_native_to_studying, self.know_studying_to_native = False, False
-        self.stage = 'day'
-        self.times_in_row = 0
+        for field, value in self.RESET_VALUES.items():
+            setattr(self, field, value)
         self.save()
 
+    # (added_by_id, studying_lang_id, know_native_to_studying, know_studying_to_native) of the word, it is used to
+    # update cached progress counters, returns None if some of these fields were deferred
+    def progress_state(self):
+        fields = ('added_by_id', 'studying_lang_id', 'know_native_to_studying', 'know_studying_to_native')
+        if not all(field in self.__dict__ for field in fields):
+            return None
+        return tuple(self.__dict__[field] for field in fields)
+
     @property
     def is_known(self):
         return self.know_native_to_studying and self.know_studying_to_native
 
+    @property
+    def is_audio_pending(self):
+        return self.audio_status == self.AUDIO_PENDING
+
+    def latest_audio(self, use):
+        # audios prefetched via prefetch_related('gttsaudio_set') are reused without extra queries
+        audios = [audio for audio in self.gttsaudio_set.all() if audio.use == use]
+        return max(audios, key=lambda audio: audio.pk) if audios else None
+
     @property
     def audio_word_name(self):
-        audios = GttsAudio.objects.filter(word=self, use='word')
-        if audios:
-            return audios.last().audio_name
-        else:
-            return None
+        audio = self.latest_audio('word')
+        return audio.audio_name if audio else None
 
     @property
     def audio_sentence_name(self):
-        audios = GttsAudio.objects.filter(word=self, use='sentence')
-        
-        if audios:
-            return audios.last().audio_name
-        else:
-            return None
+        audio = self.latest_audio('sentence')
+        return audio.audio_name if audio else None
 
     @property
     def full_audio_word_path(self):
         is_local = False if settings.SAVE_MEDIA_ON_GSC else True
-        gtts = GttsAudio.objects.filter(word=self, use='word').last()
+        gtts = self.latest_audio('word')
         if gtts:
             return AudioFilePath(gtts.audio_name).retrieve(is_local)
     
     @property
     def full_audio_sentence_path(self):
         is_local = False if settings.SAVE_MEDIA_ON_GSC else True
-        gtts = GttsAudio.objects.filter(word=self, use='sentence').last()
+        gtts = self.latest_audio('sentence')
         if gtts:
             return AudioFilePath(gtts.audio_name).retrieve(is_local)
 
@@ -100,17 +158,17 @@ class Word(models.Model):
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     studying_lang = models.ForeignKey(StudyingLanguage, on_delete=models.SET_NULL, null=True)
+    scheduler = models.CharField(max_length=20, choices=SCHEDULERS, default='ladder')
 
 
     def __str__(self):
         return f'{self.user} studying: {self.studying_lang}'
 
+    # languages are taken from the registry without queries
     @property
     def available_languages(self):
-        if self.studying_lang:
-            return StudyingLanguage.objects.exclude(name=self.studying_lang.name) 
-        else: 
-            return StudyingLanguage.objects.all()
+        studying_lang = StudyingLanguages.by_id(self.studying_lang_id)
+        return StudyingLanguages.exclude(studying_lang.name if studying_lang else None)
 
 
 
@@ -128,7 +186,7 @@ class MyUser(User):
 
     @property
     def unknown_words(self):
-        return self.words.filter(know_studying_to_native=False) | self.words.filter(know_native_to_studying=False)
+        return self.words.filter(Q(know_studying_to_native=False) | Q(know_native_to_studying=False))
 
 
 class GttsAudio(models.Model):
@@ -137,19 +195,85 @@ class GttsAudio(models.Model):
     audio_name = models.FileField(upload_to='my_files/', blank=True)
     word = models.ForeignKey(Word, on_delete=models.CASCADE)
     use = models.CharField(max_length=255, choices=USE_CHOICES)
+    # hash of (lang, normalized text), audios with the same key share one file (see GenerateAudio)
+    content_key = models.CharField(max_length=64, blank=True, db_index=True)
 
     def __str__(self):
         return str(f'{self.audio_name}')
 
+    # other audios which use the same file
+    def shared_file_references(self):
+        if self.content_key:
+            references = GttsAudio.objects.filter(content_key=self.content_key, audio_name=self.audio_name.name)
+        else:
+            references = GttsAudio.objects.filter(audio_name=self.audio_name.name)
+        return references.exclude(pk=self.pk)
+
 
 @receiver(post_delete, sender=GttsAudio)
 def signal_remove_audio_file(sender, instance, using, **kwargs):
+    # the file can be shared by several audios, so it is removed only with its last reference
+    if instance.shared_file_references().exists():
+        return
     # remove local file saved in MEDIA_ROOT directory
     RemoveFile(instance.audio_name).perform()
     # remove audio file if it was saved in Google Cloud Storage
     # RemoveFromGcs(credentials=settings.GS_CREDENTIALS, bucket_name=settings.GS_BUCKET_NAME).perform(instance.audio_name)
 
 
+@receiver(post_init, sender=Word)
+def signal_remember_progress_state(sender, instance, **kwargs):
+    # remember the progress of the word loaded from db to calculate deltas of progress counters after saving
+    instance._progress_state = instance.progress_state() if instance.pk else None
+
+
+@receiver(post_save, sender=Word)
+def signal_change_progress_counters(sender, instance, created=False, **kwargs):
+    previous = None if created else getattr(instance, '_progress_state', None)
+    current = instance.progress_state()
+
+    if current is None or (previous is None and not created):
+        # the previous progress is unknown, so the counters will be recalculated on the next retrieving
+        ProgressCounters(instance.added_by_id, instance.studying_lang_id).delete()
+    elif previous is None:
+        ProgressCounters(*current[:2]).change(ProgressCounters.contribution(*current[2:]))
+    elif previous[:2] == current[:2]:
+        deltas = ProgressCounters.deltas(ProgressCounters.contribution(*previous[2:]),
+                                         ProgressCounters.contribution(*current[2:]))
+        ProgressCounters(*current[:2]).change(deltas)
+    else:
+        ProgressCounters(*previous[:2]).change(ProgressCounters.contribution(*previous[2:], sign=-1))
+        ProgressCounters(*current[:2]).change(ProgressCounters.contribution(*current[2:]))
+
+    instance._progress_state = current
+
+
+@receiver(post_delete, sender=Word)
+def signal_decrease_progress_counters(sender, instance, **kwargs):
+    state = getattr(instance, '_progress_state', None) or instance.progress_state()
+
+    if state is None:
+        ProgressCounters(instance.added_by_id, instance.studying_lang_id).delete()
+    else:
+        ProgressCounters(*state[:2]).change(ProgressCounters.contribution(*state[2:], sign=-1))
+
+
+@receiver(post_save, sender=StudyingLanguage)
+@receiver(post_delete, sender=StudyingLanguage)
+def signal_clear_studying_languages(sender, **kwargs):
+    # the registry is cleared at once and after commit, so it isn't loaded with uncommitted changes
+    StudyingLanguages.clear()
+    transaction.on_commit(StudyingLanguages.clear)
+
+
+@receiver(post_migrate)
+def install_word_search(sender, using='default', **kwargs):
+    # the fts table of words and its triggers (sqlite) are created after migrations of core, trigram indexes
+    # of PostgreSQL are created by migrations
+    if sender.name == 'core':
+        WordSearch.backend_class(using).install(connections[using])
+
+
 @receiver(post_save, sender=User)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     # as soon as we create a new user we also create an auth token for him and save it to db
@@ -89,7 +89,10 @@ function show_audio() {
     if (audio_div) {
         audio_div.classList.remove('hiddenDiv');
         audio = audio_div.querySelector('audio');
-        audio.play()
+        // there is no audio while it's being generated (see audio_pending.html)
+        if (audio) {
+            audio.play()
+        }
 //        console.log(audio);
     }
 }
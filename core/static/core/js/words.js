@@ -19,7 +19,7 @@ document.addEventListener("DOMContentLoaded", (event) => {
         playElement[0].play();
     });
 
-    makeRequestToServerAndFillTable(url = 'api/words', 
+    makeRequestToServerAndFillTable(url = 'api/words/?pagination=cursor', 
 	                            authToken = getAuthToken(), 
 	                            performClearingTable = true);
 
@@ -82,6 +82,7 @@ function fillTableWithData(results = false, performClearingTable = true) {
                                                 ${imageBadgeTag(knowNativeToStudying = word['know_native_to_studying'], 
 						                knowStudyingToNative = word['know_studying_to_native'])}
                                                 <b style="padding-right:15px;">${word['word']}</b>
+                                                ${audioPendingTag(word['audio_status'])}
                                                 
 						<audio class="audioTag" 
 						       style="padding-right:15px;" 
@@ -167,6 +168,15 @@ function imageBadgeTag(knowNativeToStudying = false, knowStudyingToNative = fals
 }
 
 
+// this function returns the label which is shown while audios of the word are being generated
+function audioPendingTag(audioStatus = 'ready') {
+    if (audioStatus == 'pending') {
+        return '<span class="text-body-secondary">audio is being generated...</span>';
+    }
+    return '';
+}
+
+
 // this function removes all rows from table
 function clearTable() {
     $('#tableBody').children('tr').remove();
@@ -249,7 +259,7 @@ function enableSearching(authToken = null) {
 
     function callback() {
         let value = searchInput.val();
-        makeRequestToServerAndFillTable(url = `/api/words/?q=${value}`, 
+        makeRequestToServerAndFillTable(url = `/api/words/?pagination=cursor&q=${encodeURIComponent(value)}`, 
 					      authToken = authToken, 
 		                              performClearingTable = true);
     }
@@ -1,7 +1,13 @@
 from celery import shared_task
+from django.utils import timezone
+from gtts import gTTSError
+from core.lib.generate_audio import GenerateAudio
+from core.lib.progress_counters import ProgressCounters
+from core.lib.schedulers import Scheduler
 from core.models import Word
 
 
+# this task is kept to process countdown tasks which were queued before introducing Word.due_at
 @shared_task
 def reset_word_progress(id):
     words = Word.objects.filter(id=id)
@@ -9,3 +15,47 @@ def reset_word_progress(id):
         print('reseting', words[0])
         words[0].reset_progress()
 
+
+# this periodic task (see CELERY_BEAT_SCHEDULE in settings.py) resets all overdue words by one UPDATE query
+# per scheduler (the state of SM-2 and FSRS is kept, the ladder of stages starts again)
+@shared_task
+def reset_overdue_words():
+    overdue_words = Word.objects.filter(due_at__lte=timezone.now())
+    # bulk update doesn't send signals, so progress counters of affected users are dropped
+    counters = set(overdue_words.values_list('added_by_id', 'studying_lang_id'))
+
+    count = 0
+    for scheduler in Scheduler.all():
+        count += overdue_words.filter(added_by__profile__scheduler=scheduler.NAME).update(**scheduler.OVERDUE_VALUES)
+
+    for user_id, studying_lang_id in counters:
+        ProgressCounters(user_id, studying_lang_id).delete()
+    return count
+
+
+# generates audios of the word off the request path, targets are 'word' and/or 'sentence'.
+# If gTTS fails the task is retried (with exponential backoff) only for targets which haven't been generated yet,
+# any other error marks the audio of the word as failed at once
+@shared_task(bind=True, max_retries=5)
+def generate_word_audio(self, word_id, targets=('word', 'sentence')):
+    word = Word.objects.select_related('studying_lang').filter(id=word_id).first()
+    if not word:
+        return
+
+    targets = list(targets)
+
+    while targets:
+        try:
+            GenerateAudio(word).perform(target=targets[0])
+        except gTTSError as e:
+            if self.request.retries >= self.max_retries:
+                Word.objects.filter(id=word_id).update(audio_status=Word.AUDIO_FAILED)
+                return
+            raise self.retry(args=(word_id, targets), exc=e, countdown=10 * 2 ** self.request.retries)
+        except Exception:
+            # other errors (storage, the word deleted meanwhile) aren't retried, but the word mustn't stay pending
+            Word.objects.filter(id=word_id).update(audio_status=Word.AUDIO_FAILED)
+            raise
+        targets.pop(0)
+
+    Word.objects.filter(id=word_id).update(audio_status=Word.AUDIO_READY)
@@ -1,23 +1,61 @@
+import io
 import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipIf
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import User
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.migrations.operations import AddIndex
+from django.db.models import IntegerField
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.timezone import localtime
+from gtts import gTTSError
+from httpcore._exceptions import ConnectError
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
+from core.lib.benchmark import Benchmark
+from core.lib.benchmark_data import BenchmarkData
 from core.lib.generate_audio import GenerateAudio
-from core.lib.next_list_item import NextListItem
+from core.lib.query_stats import QueryStats
+from core.lib.review_queue import ReviewQueue
+from core.lib.review_forecast import ReviewForecast
+from core.lib.study_context import StudyContext
+from core.lib.studying_languages import StudyingLanguages
+from core.lib.schedulers import FSRSScheduler, LadderScheduler, Scheduler, SM2Scheduler
+from core.lib.submit_answers import SubmitAnswers
 from core.lib.remove_file import RemoveFile
 from core.lib.translate_text import TranslateText
 # from core.lib.remove_from_gcs import RemoveFromGcs
+from core.middleware import QueryCountMiddleware
 from core.models import GttsAudio, MyUser, Profile, StudyingLanguage, Word
 from core.lib.calculate_reset import CalculateReset
 from core.lib.update_word_progress import UpdateWordProgress
+from core.lib.vectorized_reset import VectorizedReset
+from core.lib.word_search import ContainsSearch, PostgresTrigramSearch, SqliteFtsSearch, WordSearch
 from core.lib.calculate_user_progress import CalculateUserProgress
+from core.lib.import_words import ImportWords
+from core.lib.postgres_operations import AddIndexConcurrentlyOnPostgres, PostgresOnly
+from core.lib.progress_counters import ProgressCounters
+from core.tasks import generate_word_audio, reset_overdue_words
+from language_cards.celery import app as celery_app
+
+# tasks enqueued by views (e.g. generating audios) are performed synchronously in tests
+celery_app.conf.task_always_eager = True
 
 
 class IndexViewTests(TestCase):
@@ -211,7 +249,9 @@ class AddWordViewTests(TestCase):
         self.assertContains(response, text='add')
 
     def test_adding_word_to_dictionary(self):
-        response = self.client.post('/add_word', self.word_details, follow=True)
+        # audios are generated by celery task which is enqueued after committing the word
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/add_word', self.word_details, follow=True)
         success_message = f'&quot;{self.word_details["word"]}&quot; was successfully added to your learn list!'
         words = Word.objects.all()
         
@@ -227,7 +267,8 @@ class AddWordViewTests(TestCase):
     def test_adding_word_to_dictionary_without_sentence(self):
         word_details = {**self.word_details, 'sentence': ''}
 
-        response = self.client.post('/add_word', word_details, follow=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/add_word', word_details, follow=True)
 
         success_message = f'&quot;{word_details['word']}&quot; was successfully added to your learn list!'
         
@@ -473,7 +514,8 @@ class EditWordViewTests(TestCase):
         # as we've created the word without using AddWord form we don't have any related audios
         self.assertEqual(self.word.gttsaudio_set.count(), 0)
 
-        self.client.post(f'/words/{self.word.id}/edit/', data=data_to_update, follow=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/words/{self.word.id}/edit/', data=data_to_update, follow=True)
         
         word = Word.objects.get(id=self.word.id)
         
@@ -497,7 +539,8 @@ class EditWordViewTests(TestCase):
                 'sentence': 'Cats like sitting in box.'
         }
         
-        self.client.post('/add_word', new_word)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/add_word', new_word)
         
         word = Word.objects.last()
         related_word_audios = word.gttsaudio_set
@@ -513,7 +556,8 @@ class EditWordViewTests(TestCase):
             'translation': 'клавиатура',
             'sentence': 'I have never used mechanical keyboard.'
         }
-        self.client.post(f'/words/{word.id}/edit/', data_to_update)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/words/{word.id}/edit/', data_to_update)
 
         updated_word = Word.objects.get(id=word.id)
         
@@ -536,7 +580,8 @@ class EditWordViewTests(TestCase):
                 'sentence': 'Cats like sitting in box.'
         }
 
-        self.client.post('/add_word', new_word)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/add_word', new_word)
         
         word = Word.objects.last()
         related_word_audios = word.gttsaudio_set
@@ -550,7 +595,8 @@ class EditWordViewTests(TestCase):
             'sentence': 'Box is very useful tool when you change your lodgings.'
         }
 
-        self.client.post(f'/words/{word.id}/edit/', data_to_update)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/words/{word.id}/edit/', data_to_update)
         
         updated_word = Word.objects.get(id=word.id)
         current_word_audio = updated_word.gttsaudio_set.filter(use='word')[0]
@@ -835,46 +881,109 @@ class TranslateTextTests(TestCase):
         self.assertNotEqual(result, 'pencil')
 
 
-class NextListItemTests(TestCase):
-    def test_when_empty_list(self):
-        lst = []
-        current_item = 11
+class TranslationCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        TranslateText.clear_local_cache()
+        patcher = mock.patch.object(TranslateText.shared_translator(), 'translate',
+                                    side_effect=lambda text, src, dest: mock.Mock(text=f'{dest}:{text}'))
+        self.translate = patcher.start()
+        self.addCleanup(patcher.stop)
 
-        nli = NextListItem(lst, current_item)
-        result = nli.calculate()
-        self.assertEqual(result, None)
+    def test_translation_is_requested_only_once(self):
+        self.assertEqual(TranslateText('en', 'ru').perform('cat'), 'ru:cat')
+        self.assertEqual(TranslateText('en', 'ru').perform('  cat '), 'ru:cat')
+        self.assertEqual(self.translate.call_count, 1)
 
-    def test_when_incorrect_current_item(self):
-        lst = [10, 20, 30, 40, 50]
-        item = 11
+    def test_translations_are_cached_by_languages(self):
+        TranslateText('en', 'ru').perform('cat')
+        TranslateText('bg', 'ru').perform('cat')
+        TranslateText('en', 'bg').perform('cat')
+        self.assertEqual(self.translate.call_count, 3)
 
-        nli = NextListItem(lst, item)
-        result = nli.calculate()
-        self.assertEqual(result, None)
+    def test_translation_from_shared_cache(self):
+        TranslateText('en', 'ru').perform('cat')
+        # another worker has empty local cache but shares django cache
+        TranslateText.clear_local_cache()
 
-    def test_when_current_item_is_last(self):
-        lst = [10, 20, 30, 40, 50]
-        current_item = 50
+        self.assertEqual(TranslateText('en', 'ru').perform('cat'), 'ru:cat')
+        self.assertEqual(self.translate.call_count, 1)
 
-        nli = NextListItem(lst, current_item)
-        result = nli.calculate()
-        self.assertEqual(result, None)
+    def test_settings_of_cache_are_read_on_use(self):
+        with self.settings(TRANSLATION_CACHE_TIMEOUT=60, TRANSLATION_LOCAL_CACHE_SIZE=2):
+            with mock.patch.object(cache, 'set') as cache_set:
+                TranslateText('en', 'ru').perform('cat')
 
-    def test_when_current_item_is_first(self):
-        lst = [10, 20, 30, 40, 50]
-        current_item = 10
+            self.assertEqual(cache_set.call_args.kwargs['timeout'], 60)
+            self.assertEqual((TranslateText.local_cache().maxsize, TranslateText.local_cache().ttl), (2, 60))
 
-        nli = NextListItem(lst, current_item)
-        result = nli.calculate()
-        self.assertEqual(result, 20)
+        self.assertEqual(TranslateText.local_cache().maxsize, 4096)
 
-    def test_when_current_item_is_the_only_one(self):
-        lst = [10,]
-        current_item = 10
+    def test_failed_translation_is_not_cached(self):
+        self.translate.side_effect = ConnectError()
+        self.assertEqual(TranslateText('en', 'ru').perform('cat'), '')
 
-        nli = NextListItem(lst, current_item)
-        result = nli.calculate()
-        self.assertEqual(result, None)
+        self.translate.side_effect = lambda text, src, dest: mock.Mock(text='кошка')
+        self.assertEqual(TranslateText('en', 'ru').perform('cat'), 'кошка')
+
+    def test_translating_many_texts_by_one_request(self):
+        self.translate.side_effect = lambda text, src, dest: mock.Mock(text=text.upper())
+        TranslateText('en', 'ru').perform('cat')
+
+        translations = TranslateText('en', 'ru').perform_many(['dog', 'cat', '', 'tree', 'dog'])
+
+        self.assertEqual(translations, ['DOG', 'CAT', None, 'TREE', 'DOG'])
+        # 'cat' was cached, 'dog' and 'tree' are translated by one request
+        self.assertEqual(self.translate.call_count, 2)
+        self.assertEqual(self.translate.call_args.args[0], 'dog\ntree')
+        self.assertEqual(TranslateText('en', 'ru').perform('tree'), 'TREE')
+        self.assertEqual(self.translate.call_count, 2)
+
+    def test_translating_many_texts_one_by_one_when_lines_are_merged(self):
+        self.translate.side_effect = lambda text, src, dest: mock.Mock(text=text.replace('\n', ' ').upper())
+
+        translations = TranslateText('en', 'ru').perform_many(['dog', 'tree'])
+
+        self.assertEqual(translations, ['DOG', 'TREE'])
+        self.assertEqual(self.translate.call_count, 3)
+
+    def test_splitting_texts_into_batches(self):
+        texts = ['a' * 2000, 'b' * 2000, 'c' * 2000]
+        self.assertEqual([len(batch) for batch in TranslateText.batches(texts)], [2, 1])
+
+    def test_translate_many_api(self):
+        self.translate.side_effect = lambda text, src, dest: mock.Mock(text=text.upper())
+        User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        self.client.login(username='pasha', password='1asdfX')
+
+        response = self.client.post('/translate_many', {'source_lang': 'en', 'texts': ['dog', '', 'cat']},
+                                    content_type='application/json')
+        data = json.loads(response.content)
+
+        self.assertEqual(data['status'], 'ok')
+        self.assertEqual(data['translations'], ['DOG', '', 'CAT'])
+
+    def test_translate_many_api_needs_login(self):
+        response = self.client.post('/translate_many', {'source_lang': 'en', 'texts': ['dog']},
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 401)
+        self.translate.assert_not_called()
+
+    def test_translate_many_api_limits_length_of_texts(self):
+        User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        self.client.login(username='pasha', password='1asdfX')
+
+        for texts in (['a' * 501], ['a' * 500] * 21):
+            with self.subTest(length=sum(map(len, texts))):
+                response = self.client.post('/translate_many', {'source_lang': 'en', 'texts': texts},
+                                            content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+
+        self.translate.assert_not_called()
+
+    def test_translator_is_shared(self):
+        self.assertIs(TranslateText('en', 'ru').translator, TranslateText('bg', 'ru').translator)
 
 
 class TokenTests(TestCase):
@@ -1107,6 +1216,206 @@ class WordViewSetTests(TestCase):
         self.assertEqual(results['next'], None)
         self.assertEqual(results['results'], [])
 
+    def test_audio_paths_do_not_depend_on_count_of_words(self):
+        misha = User.objects.create_user(username='misha', password='1asdfX', email='misha@gmail.com')
+        misha.profile.studying_lang = StudyingLanguage.objects.get(name='en')
+        misha.profile.save()
+        headers = {'Authorization': 'Token ' + Token.objects.get(user=misha).key}
+
+        def add_words_with_audios(count):
+            for number in range(count):
+                word = Word.objects.create(added_by=misha, studying_lang=misha.profile.studying_lang,
+                                           word=f'audio{Word.objects.count()}', translation='аудио')
+                GttsAudio.objects.create(word=word, use='word', audio_name=f'my_files/{word.id}_word.mp3')
+                GttsAudio.objects.create(word=word, use='sentence', audio_name=f'my_files/{word.id}_sentence.mp3')
+
+        def list_words():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/words/?pagination=cursor&page_size=100', headers=headers)
+            return json.loads(response.content)['results'], len(queries)
+
+        add_words_with_audios(5)
+        results, queries_count = list_words()
+        self.assertEqual(len(results), 5)
+
+        add_words_with_audios(5)
+        results, doubled_queries_count = list_words()
+        self.assertEqual(len(results), 10)
+        self.assertEqual(doubled_queries_count, queries_count)
+
+        last = Word.objects.filter(added_by=misha).latest('id')
+        result = next(result for result in results if result['word'] == last.word)
+        self.assertEqual(result['full_audio_word_path'], f'/media/my_files/{last.id}_word.mp3')
+        self.assertEqual(result['full_audio_sentence_path'], f'/media/my_files/{last.id}_sentence.mp3')
+
+
+class ImportWordsApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.en = StudyingLanguage.objects.create(name='en')
+        cls.pasha = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        cls.pasha.profile.studying_lang = cls.en
+        cls.pasha.profile.save()
+        cls.headers = {'Authorization': 'Token ' + Token.objects.get(user=cls.pasha).key}
+        Word.objects.create(added_by=cls.pasha, studying_lang=cls.en, word='cat', translation='кошка')
+
+    def import_words(self, data, **kwargs):
+        with mock.patch('core.api.views.group') as audio_group:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/words/import/', data, headers=self.headers, **kwargs)
+        return response, audio_group
+
+    def test_importing_json_words(self):
+        words = [
+            {'word': 'cat', 'translation': 'кошка'},
+            {'word': 'dog', 'translation': 'собака', 'sentence': 'the dog barks'},
+            {'word': 'dog', 'translation': 'пёс'},
+            {'word': 'tree', 'translation': ''},
+            {'word': 'house', 'translation': 'дом'},
+        ]
+
+        response, audio_group = self.import_words({'format': 'json', 'words': words}, content_type='application/json')
+        result = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(result['skipped'], 3)
+        self.assertEqual(Word.objects.filter(added_by=self.pasha).count(), 3)
+
+        dog = Word.objects.get(word='dog')
+        self.assertEqual(dog.sentence, 'the dog barks')
+        self.assertTrue(dog.is_audio_pending)
+
+        # audios for all imported words are generated by one group of tasks
+        audio_group.assert_called_once()
+        self.assertEqual(len(audio_group.call_args.args[0]), 2)
+        audio_group.return_value.apply_async.assert_called_once()
+
+    def test_importing_csv_file(self):
+        content = 'word,translation,sentence\nfactory,фабрика,he works in a clothing factory\ncanteen,столовая,\n'
+        upload = SimpleUploadedFile('words.csv', content.encode(), content_type='text/csv')
+
+        response, _ = self.import_words({'format': 'csv', 'file': upload})
+
+        self.assertEqual(json.loads(response.content)['created'], 2)
+        self.assertEqual(Word.objects.get(word='factory').sentence, 'he works in a clothing factory')
+
+    def test_importing_anki_export(self):
+        content = '#separator:tab\n#html:true\nsmallpox\t<b>оспа</b>\nbox\tкоробка\tCats like sitting in box.\n'
+
+        response, _ = self.import_words({'format': 'anki', 'content': content}, content_type='application/json')
+
+        self.assertEqual(json.loads(response.content)['created'], 2)
+        self.assertEqual(Word.objects.get(word='smallpox').translation, 'оспа')
+
+    def test_duplicates_are_checked_by_one_query(self):
+        words = [{'word': f'word{i}', 'translation': f'слово{i}'} for i in range(100)]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.import_words({'format': 'json', 'words': words}, content_type='application/json')
+
+        selects = [q for q in queries if q['sql'].startswith('SELECT') and '"core_word"' in q['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(Word.objects.filter(added_by=self.pasha).count(), 101)
+
+    def test_failed_import_creates_no_words(self):
+        rows = [{'word': f'word{number}', 'translation': 'слово'} for number in range(3)]
+
+        with mock.patch.object(ProgressCounters, 'change', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                ImportWords(self.pasha, self.en).perform(rows)
+
+        self.assertEqual(Word.objects.filter(added_by=self.pasha).count(), 1)
+
+    def test_importing_with_invalid_format(self):
+        response, _ = self.import_words({'format': 'xml', 'content': '<word/>'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_importing_content_of_invalid_type(self):
+        for data in ({'format': 'csv', 'content': 123}, {'format': 'anki', 'content': ['a']},
+                     {'format': 'json', 'words': {'word': 'dog', 'translation': 'собака'}}):
+            with self.subTest(data=data):
+                response, _ = self.import_words(data, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+
+    def test_importing_json_words_which_are_not_list(self):
+        # words of multipart request are text
+        response, _ = self.import_words({'format': 'json', 'words': 'dog'})
+        self.assertEqual(response.status_code, 400)
+
+        response, _ = self.import_words({'format': 'json', 'words': '{"word": "dog"}'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Word.objects.filter(added_by=self.pasha).count(), 1)
+
+    def test_importing_json_file(self):
+        content = json.dumps([{'word': 'dog', 'translation': 'собака'}])
+        upload = SimpleUploadedFile('words.json', content.encode(), content_type='application/json')
+
+        response, _ = self.import_words({'format': 'json', 'file': upload})
+
+        self.assertEqual(json.loads(response.content)['created'], 1)
+
+
+class PostgresOperationsTests(TestCase):
+    # the database is chosen by the connection which the migration is applied to
+    def schema_editor(self, vendor):
+        return mock.Mock(connection=mock.Mock(vendor=vendor))
+
+    def test_operation_is_applied_only_to_postgres(self):
+        operation = mock.Mock()
+
+        PostgresOnly(operation).database_forwards('core', self.schema_editor('sqlite'), None, None)
+        operation.database_forwards.assert_not_called()
+
+        PostgresOnly(operation).database_forwards('core', self.schema_editor('postgresql'), None, None)
+        operation.database_forwards.assert_called_once()
+
+        PostgresOnly(operation).database_backwards('core', self.schema_editor('postgresql'), None, None)
+        operation.database_backwards.assert_called_once()
+
+    def test_index_is_added_concurrently_only_to_postgres(self):
+        operation = AddIndexConcurrentlyOnPostgres('word', Word._meta.indexes[0])
+
+        with mock.patch.object(AddIndex, 'database_forwards') as add_index:
+            with mock.patch.object(AddIndexConcurrently, 'database_forwards') as add_concurrently:
+                operation.database_forwards('core', self.schema_editor('sqlite'), None, None)
+                add_index.assert_called_once()
+                add_concurrently.assert_not_called()
+
+                operation.database_forwards('core', self.schema_editor('postgresql'), None, None)
+                add_concurrently.assert_called_once()
+
+
+class WordQueryPlansCommandTests(TestCase):
+    def setUp(self):
+        en = StudyingLanguage.objects.create(name='en')
+        pasha = User.objects.create(username='pasha', email='pasha@example.com')
+        pasha.profile.studying_lang = en
+        pasha.profile.save()
+        Word.objects.create(added_by=pasha, studying_lang=en, word='cat', translation='кошка')
+
+    @override_settings(DEBUG=True)
+    def test_showing_query_plans_with_and_without_indexes(self):
+        out = io.StringIO()
+        call_command('word_query_plans', username='pasha', stdout=out)
+        output = out.getvalue()
+
+        without_indexes, with_indexes = output.split('Query plans with composite indexes:')
+        self.assertNotIn('word_unknown_n2s_idx', without_indexes)
+        if connection.vendor == 'sqlite':
+            # indexes of foreign keys aren't dropped, so the plan is the same as before adding composite indexes
+            self.assertIn('USING INDEX core_word_', without_indexes)
+        self.assertIn('word_unknown_n2s_idx', with_indexes)
+        # the indexes are restored after the command
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Word._meta.db_table)
+        self.assertIn('word_unknown_n2s_idx', constraints)
+
+    def test_indexes_are_not_dropped_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('word_query_plans', username='pasha', stdout=io.StringIO())
+
+
 class StudyingLanguageTests(TestCase):
     def test_successful_creating_language(self):
         self.assertEqual(StudyingLanguage.objects.count(), 0)
@@ -1318,6 +1627,163 @@ class GenerateAudioTests(TestCase):
         word.delete()
 
 
+class GenerateWordAudioTaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.credentials = {'username': 'pasha', 'password': '1asdfX'}
+        cls.user = User.objects.create_user(**cls.credentials)
+        cls.en = StudyingLanguage.objects.create(name='en')
+        cls.user.profile.studying_lang = cls.en
+        cls.user.profile.save()
+
+    def create_word(self):
+        return Word.objects.create(added_by=self.user, studying_lang=self.en, word='cat', translation='кошка',
+                                   sentence='black cat', audio_status=Word.AUDIO_PENDING)
+
+    def test_adding_word_does_not_generate_audio_in_request(self):
+        self.client.login(**self.credentials)
+
+        with mock.patch('core.forms.generate_word_audio.delay') as delay:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.client.post('/add_word', {'word': 'cat', 'translation': 'кошка', 'sentence': 'black cat'})
+
+            word = Word.objects.get(word='cat')
+            self.assertTrue(word.is_audio_pending)
+            self.assertEqual(GttsAudio.objects.count(), 0)
+            delay.assert_not_called()
+
+            callbacks[0]()
+            delay.assert_called_once_with(word.id)
+
+    def test_card_of_word_with_pending_audio(self):
+        word = self.create_word()
+        self.client.login(**self.credentials)
+
+        response = self.client.get(f'/native_to_studying/{word.id}/')
+        en_audio = response.content.decode().split('id="en_audio"')[1].split('id="sentence"')[0]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('audio is being generated...', en_audio)
+        # there is nothing to play, so show_audio() of translation_exercise.js must not expect the audio tag
+        self.assertNotIn('<audio', en_audio)
+
+    def test_pending_audio_status_in_api(self):
+        self.create_word()
+        token = Token.objects.get(user=self.user).key
+
+        response = self.client.get('/api/words/', headers={'Authorization': 'Token ' + token})
+
+        self.assertEqual(json.loads(response.content)['results'][0]['audio_status'], 'pending')
+
+    def test_successful_generating_audio(self):
+        word = self.create_word()
+
+        with mock.patch.object(GenerateAudio, 'perform') as perform:
+            generate_word_audio.delay(word.id)
+
+        self.assertEqual([c.kwargs['target'] for c in perform.call_args_list], ['word', 'sentence'])
+        self.assertEqual(Word.objects.get(id=word.id).audio_status, Word.AUDIO_READY)
+
+    def test_retrying_only_failed_targets(self):
+        word = self.create_word()
+        # the audio for 'sentence' fails once, the audio for 'word' must not be generated again
+        side_effects = [None, gTTSError('Failed to connect'), None]
+
+        with mock.patch.object(GenerateAudio, 'perform', side_effect=side_effects) as perform:
+            generate_word_audio.apply(args=(word.id,))
+
+        self.assertEqual([c.kwargs['target'] for c in perform.call_args_list], ['word', 'sentence', 'sentence'])
+        self.assertEqual(Word.objects.get(id=word.id).audio_status, Word.AUDIO_READY)
+
+    def test_failed_generating_audio(self):
+        word = self.create_word()
+
+        with mock.patch.object(GenerateAudio, 'perform', side_effect=gTTSError('Failed to connect')):
+            generate_word_audio.apply(args=(word.id,))
+
+        self.assertEqual(Word.objects.get(id=word.id).audio_status, Word.AUDIO_FAILED)
+
+    def test_unexpected_error_of_generating_audio(self):
+        word = self.create_word()
+
+        with mock.patch.object(GenerateAudio, 'perform', side_effect=OSError('No space left on device')) as perform:
+            result = generate_word_audio.apply(args=(word.id,))
+
+        self.assertIsInstance(result.result, OSError)
+        self.assertEqual(perform.call_count, 1)
+        self.assertEqual(Word.objects.get(id=word.id).audio_status, Word.AUDIO_FAILED)
+
+
+class FakeTTS:
+    # this class replaces gTTS in tests to generate audios without network
+    def __init__(self, text='', lang='en'):
+        self.text = text
+
+    def write_to_fp(self, fp):
+        fp.write(self.text.encode())
+
+
+@mock.patch('core.lib.generate_audio.gTTS', FakeTTS)
+class SharedAudioTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pasha = User.objects.create(username='pasha', email='pasha@example.com')
+        cls.dima = User.objects.create(username='dima', email='dima@example.com')
+        cls.en = StudyingLanguage.objects.create(name='en')
+        cls.bg = StudyingLanguage.objects.create(name='bg')
+
+    def tearDown(self):
+        for word in Word.objects.all():
+            word.delete()
+
+    def create_word(self, user, text, studying_lang=None):
+        word = Word.objects.create(added_by=user, studying_lang=studying_lang or self.en, word=text, translation='-')
+        GenerateAudio(word).perform(target='word')
+        return word
+
+    def test_the_same_text_shares_one_file(self):
+        pasha_cat = self.create_word(self.pasha, 'cat')
+        dima_cat = self.create_word(self.dima, '  Cat ')
+
+        self.assertEqual(pasha_cat.audio_word_name.name, dima_cat.audio_word_name.name)
+        self.assertTrue(os.path.exists(RemoveFile(pasha_cat.audio_word_name).absolute_path_to_file()))
+
+    def test_different_language_or_text_does_not_share_file(self):
+        en_cat = self.create_word(self.pasha, 'cat')
+        bg_cat = self.create_word(self.dima, 'cat', studying_lang=self.bg)
+        dog = self.create_word(self.dima, 'dog')
+
+        self.assertNotEqual(en_cat.audio_word_name.name, bg_cat.audio_word_name.name)
+        self.assertNotEqual(en_cat.audio_word_name.name, dog.audio_word_name.name)
+
+    def test_file_is_removed_with_the_last_reference(self):
+        pasha_cat = self.create_word(self.pasha, 'cat')
+        dima_cat = self.create_word(self.dima, 'cat')
+        path = RemoveFile(pasha_cat.audio_word_name).absolute_path_to_file()
+
+        pasha_cat.delete()
+        self.assertTrue(os.path.exists(path))
+
+        dima_cat.delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_writing_audio_without_temporary_files(self):
+        with mock.patch('tempfile.NamedTemporaryFile') as temporary_file:
+            cat = self.create_word(self.pasha, 'cat')
+
+        temporary_file.assert_not_called()
+        with open(RemoveFile(cat.audio_word_name).absolute_path_to_file(), 'rb') as f:
+            self.assertEqual(f.read(), b'cat')
+
+    def test_regenerating_removed_file(self):
+        pasha_cat = self.create_word(self.pasha, 'cat')
+        RemoveFile(pasha_cat.audio_word_name).perform()
+
+        dima_cat = self.create_word(self.dima, 'cat')
+
+        self.assertTrue(os.path.exists(RemoveFile(dima_cat.audio_word_name).absolute_path_to_file()))
+
+
 class AvailableLanguagesTests(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -1609,6 +2075,61 @@ class UpdateWordProgressTests(TestCase):
         self.assertEqual(word.stage, 'half_year')
         self.assertEqual(word.times_in_row, 6)
 
+    def test_setting_due_at_of_word(self):
+        self.word.stage = 'week'
+        self.word.times_in_row = 0
+        self.word.save()
+
+        before = timezone.now()
+        UpdateWordProgress(self.word).perform()
+
+        word = Word.objects.last()
+
+        self.assertGreaterEqual(word.due_at, before + timedelta(days=7))
+        self.assertLessEqual(word.due_at, timezone.now() + timedelta(days=7))
+
+
+class ResetOverdueWordsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='pasha', email='mail@example.com')
+        cls.en = StudyingLanguage.objects.create(name='en')
+
+    def create_word(self, word, due_at):
+        return Word.objects.create(added_by=self.user,
+                                   studying_lang=self.en,
+                                   word=word,
+                                   translation=word,
+                                   know_native_to_studying=True,
+                                   know_studying_to_native=True,
+                                   stage='month',
+                                   times_in_row=2,
+                                   due_at=due_at)
+
+    def test_resetting_only_overdue_words(self):
+        overdue = self.create_word('cat', timezone.now() - timedelta(minutes=1))
+        not_overdue = self.create_word('dog', timezone.now() + timedelta(days=1))
+        unscheduled = self.create_word('tree', None)
+
+        self.assertEqual(reset_overdue_words(), 1)
+
+        overdue.refresh_from_db()
+        self.assertFalse(overdue.know_native_to_studying)
+        self.assertFalse(overdue.know_studying_to_native)
+        self.assertEqual(overdue.stage, 'day')
+        self.assertEqual(overdue.times_in_row, 0)
+        self.assertIsNone(overdue.due_at)
+
+        for word in (not_overdue, unscheduled):
+            word.refresh_from_db()
+            self.assertTrue(word.is_known)
+            self.assertEqual(word.stage, 'month')
+
+    def test_reset_progress_clears_due_at(self):
+        word = self.create_word('cat', timezone.now() + timedelta(days=1))
+        word.reset_progress()
+        self.assertIsNone(Word.objects.get(id=word.id).due_at)
+
 
 class CalculateProgressTests(TestCase):
     @classmethod
@@ -1763,4 +2284,1142 @@ class CalculateProgressTests(TestCase):
         self.assertEqual(calc.perform('total'), 33.33)
         self.assertEqual(calc.perform('native_to_studying'), 66.67)
         self.assertEqual(calc.perform('studying_to_native'), 33.33)
-        
\ No newline at end of file
+
+    def test_user_progress_is_calculated_by_one_query(self):
+        words = [
+            {'word': 'smallpox', 'translation': 'оспа', 'know_native_to_studying': True, 'know_studying_to_native': True},
+            {'word': 'cat', 'translation': 'кошка', 'know_native_to_studying': True},
+            {'word': 'tree', 'translation': 'дерево', 'know_studying_to_native': True},
+            {'word': 'house', 'translation': 'дом'},
+        ]
+
+        for word in words:
+            Word.objects.create(added_by=self.user, studying_lang=self.en, **word)
+
+        # words of another user and another language must not be counted
+        Word.objects.create(added_by=self.dima, studying_lang=self.en, word='dog', translation='собака')
+        Word.objects.create(added_by=self.user, studying_lang=self.bg, word='сако', translation='пиджак')
+
+        with self.assertNumQueries(1):
+            calc = CalculateUserProgress(user=self.user, studying_lang=self.en)
+            self.assertEqual(calc.total_words_count, 4)
+            self.assertEqual(calc.known_count('total'), 1)
+            self.assertEqual(calc.known_count('native_to_studying'), 2)
+            self.assertEqual(calc.known_count('studying_to_native'), 2)
+            self.assertEqual(calc.unknown_count, 3)
+            self.assertEqual(calc.perform('native_to_studying'), 50)
+
+    def test_invalid_type_of_progress(self):
+        calc = CalculateUserProgress(user=self.user, studying_lang=self.en)
+        with self.assertRaises(ValueError):
+            calc.perform('invalid')
+
+
+@override_settings(PROGRESS_COUNTERS_ENABLED=True)
+class ProgressCountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.credentials = {'username': 'pasha', 'password': '1asdfX', 'email': 'pasha@gmail.com'}
+        cls.user = User.objects.create_user(**cls.credentials)
+        cls.en = StudyingLanguage.objects.create(name='en')
+        cls.bg = StudyingLanguage.objects.create(name='bg')
+
+    def setUp(self):
+        cache.clear()
+
+    def cached_counts(self, studying_lang=None):
+        return CalculateUserProgress(self.user, studying_lang or self.en, cached=True).counts
+
+    def assertCountersMatchDb(self, studying_lang=None):
+        studying_lang = studying_lang or self.en
+        with self.assertNumQueries(0):
+            cached = self.cached_counts(studying_lang)
+        self.assertEqual(cached, CalculateUserProgress(self.user, studying_lang).counts)
+
+    def test_counters_are_cached(self):
+        Word.objects.create(added_by=self.user, studying_lang=self.en, word='cat', translation='кошка')
+
+        with self.assertNumQueries(1):
+            self.cached_counts()
+
+        self.assertCountersMatchDb()
+
+    def test_counters_are_changed_after_creating_and_deleting_words(self):
+        self.cached_counts()
+
+        cat = Word.objects.create(added_by=self.user, studying_lang=self.en, word='cat', translation='кошка',
+                                  know_native_to_studying=True, know_studying_to_native=True)
+        Word.objects.create(added_by=self.user, studying_lang=self.en, word='dog', translation='собака')
+        Word.objects.create(added_by=self.user, studying_lang=self.bg, word='сако', translation='пиджак')
+        self.assertCountersMatchDb()
+        self.assertEqual(self.cached_counts()['words_count'], 2)
+
+        Word.objects.get(id=cat.id).delete()
+        self.assertCountersMatchDb()
+        self.assertEqual(self.cached_counts()['total'], 0)
+
+    def test_counters_are_calculated_without_shared_cache(self):
+        Word.objects.create(added_by=self.user, studying_lang=self.en, word='cat', translation='кошка')
+
+        with self.settings(PROGRESS_COUNTERS_ENABLED=False):
+            with self.assertNumQueries(1):
+                self.cached_counts()
+            # a word moved by another process (without signals in this one) is not counted any more
+            Word.objects.filter(word='cat').update(studying_lang=self.bg)
+
+            with self.assertNumQueries(1):
+                self.assertEqual(self.cached_counts()['words_count'], 0)
+
+        self.assertEqual(cache.get_many(list(ProgressCounters(self.user.id, self.en.id).cache_keys())), {})
+
+    def test_counters_are_changed_after_answering_and_resetting(self):
+        word = Word.objects.create(added_by=self.user, studying_lang=self.en, word='cat', translation='кошка')
+        self.cached_counts()
+        self.client.login(**self.credentials)
+
+        for direction in ('studying_to_native', 'native_to_studying'):
+            json_data = json.dumps({'id': word.id, 'direction': direction, 'correctness': True})
+            self.client.post(f'/{direction}/{word.id}/', data=json_data, content_type='application/json')
+
+        self.assertCountersMatchDb()
+        self.assertEqual(self.cached_counts()['total'], 1)
+
+        self.client.get(f'/words/{word.id}/reset/')
+        self.assertCountersMatchDb()
+        self.assertEqual(self.cached_counts()['total'], 0)
+
+    def test_counters_are_recalculated_after_resetting_overdue_words(self):
+        Word.objects.create(added_by=self.user, studying_lang=self.en, word='cat', translation='кошка',
+                            know_native_to_studying=True, know_studying_to_native=True,
+                            due_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.cached_counts()['total'], 1)
+
+        reset_overdue_words()
+
+        self.assertEqual(self.cached_counts()['total'], 0)
+        
+
+class WordSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        self.en = StudyingLanguage.objects.create(name='en')
+
+        for word, translation in (('smallpox', 'оспа'), ('pox', 'оспа'), ('small', 'маленький'),
+                                  ('canteen', 'столовая'), ('mall', 'торговый центр')):
+            Word.objects.create(added_by=self.user, studying_lang=self.en, word=word, translation=translation)
+
+        self.words = Word.objects.filter(added_by=self.user, studying_lang=self.en).order_by('know_native_to_studying')
+
+    def search(self, query, backend=WordSearch):
+        return [word.word for word in backend(self.words).perform(query)]
+
+    def test_sqlite_backend_is_chosen_by_vendor(self):
+        self.assertIs(WordSearch.backend_class(), SqliteFtsSearch)
+        self.assertTrue(SqliteFtsSearch.is_installed(connection))
+
+    def test_exact_and_prefix_matches_go_first(self):
+        self.assertEqual(self.search('small'), ['small', 'smallpox'])
+        self.assertEqual(self.search('mall'), ['mall', 'smallpox', 'small'])
+
+    def test_search_by_translation(self):
+        self.assertEqual(self.search('оспа'), ['smallpox', 'pox'])
+
+    def test_short_query_is_searched_by_like(self):
+        self.assertEqual(self.search('po'), ['pox', 'smallpox'])
+
+    def test_fuzzy_matches(self):
+        self.assertEqual(self.search('smalpox'), ['smallpox', 'small'])
+        self.assertEqual(self.search('smalpox', backend=ContainsSearch), [])
+
+    def test_empty_query_returns_all_words(self):
+        self.assertEqual(len(self.search('   ')), 5)
+
+    def test_index_follows_changes_of_words(self):
+        word = Word.objects.get(word='canteen')
+        word.word = 'cafeteria'
+        word.save()
+
+        self.assertEqual(self.search('canteen'), [])
+        self.assertEqual(self.search('cafeteria'), ['cafeteria'])
+
+        word.delete()
+        self.assertEqual(self.search('cafeteria'), [])
+
+    def test_words_of_other_users_are_not_found(self):
+        vova = User.objects.create_user(username='vova', password='12Sxz_', email='vova@gmail.com')
+        Word.objects.create(added_by=vova, studying_lang=self.en, word='canteen', translation='столовая')
+
+        self.assertEqual(self.search('canteen'), ['canteen'])
+
+
+class WordCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        self.en = StudyingLanguage.objects.create(name='en')
+        self.user.profile.studying_lang = self.en
+        self.user.profile.save()
+        self.headers = {'Authorization': 'Token ' + Token.objects.get(user=self.user).key}
+
+        for number in range(7):
+            Word.objects.create(added_by=self.user, studying_lang=self.en, word=f'word{number}',
+                                translation=f'слово{number}', know_native_to_studying=number % 3 == 0,
+                                know_studying_to_native=number % 2 == 0)
+
+        expected = Word.objects.filter(added_by=self.user).order_by('know_native_to_studying',
+                                                                     'know_studying_to_native', 'id')
+        self.expected = [word.word for word in expected]
+
+    def collect(self, url):
+        words, pages = [], 0
+
+        while url:
+            results = json.loads(self.client.get(url, headers=self.headers).content)
+            words += [word['word'] for word in results['results']]
+            url, pages = results['next'], pages + 1
+        return words, pages
+
+    def test_all_pages_follow_the_ordering_of_words(self):
+        words, pages = self.collect('/api/words/?pagination=cursor&page_size=3')
+
+        self.assertEqual(words, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_default_page_size_and_no_count(self):
+        results = json.loads(self.client.get('/api/words/?pagination=cursor', headers=self.headers).content)
+
+        self.assertEqual(len(results['results']), 5)
+        self.assertNotIn('count', results)
+        self.assertIn('cursor=', results['next'])
+
+    def test_count_is_returned_on_request(self):
+        response = self.client.get('/api/words/?pagination=cursor&page_size=2&count=true', headers=self.headers)
+        results = json.loads(response.content)
+
+        self.assertEqual(results['count'], 7)
+        self.assertEqual(len(results['results']), 2)
+
+    def test_page_size_is_limited(self):
+        for _ in range(100):
+            Word.objects.create(added_by=self.user, studying_lang=self.en, word='word', translation='слово')
+
+        response = self.client.get('/api/words/?pagination=cursor&page_size=1000', headers=self.headers)
+
+        self.assertEqual(len(json.loads(response.content)['results']), 100)
+
+    def test_pages_are_retrieved_without_offset_and_count(self):
+        url = json.loads(self.client.get('/api/words/?pagination=cursor&page_size=3',
+                                         headers=self.headers).content)['next']
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, headers=self.headers)
+
+        word_queries = [query['sql'] for query in queries if '"core_word"' in query['sql']]
+        self.assertTrue(word_queries)
+        self.assertFalse([sql for sql in word_queries if 'OFFSET' in sql or 'COUNT(' in sql])
+
+    def test_search_with_cursor_pagination(self):
+        words, _ = self.collect('/api/words/?pagination=cursor&page_size=2&q=word')
+
+        self.assertEqual(words, self.expected)
+
+    def test_similarity_of_cursor_is_integer(self):
+        similarity = PostgresTrigramSearch(Word.objects.all()).annotations('word')['search_similarity']
+
+        self.assertIsInstance(similarity.output_field, IntegerField)
+
+    @skipIf(connection.vendor != 'postgresql', 'similarity of words is calculated only by PostgreSQL')
+    def test_search_with_tied_similarities(self):
+        # every word has 4 of 10 trigrams in common with the query, so all of them have the same similarity
+        words = [Word.objects.create(added_by=self.user, studying_lang=self.en, word=f'bcat0{number}',
+                                     translation='кошка').word for number in range(7)]
+
+        found, _ = self.collect('/api/words/?pagination=cursor&page_size=2&q=bcatzz')
+
+        self.assertEqual(found, words)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/words/?cursor=invalid', headers=self.headers)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_number_pagination_is_default(self):
+        results = json.loads(self.client.get('/api/words/', headers=self.headers).content)
+
+        self.assertEqual(results['count'], 7)
+        self.assertIn('page=2', results['next'])
+
+
+class ReviewQueueTests(TestCase):
+    def setUp(self):
+        self.credentials = {'username': 'pasha', 'password': '1asdfX', 'email': 'pasha@gmail.com'}
+        self.user = User.objects.create_user(**self.credentials)
+        self.en = StudyingLanguage.objects.create(name='en')
+        self.user.profile.studying_lang = self.en
+        self.user.profile.save()
+
+        for number in range(20):
+            Word.objects.create(added_by=self.user, studying_lang=self.en, word=f'word{number}',
+                                translation=f'слово{number}', know_studying_to_native=number % 4 == 0)
+
+        self.words = Word.objects.filter(added_by=self.user, studying_lang=self.en)
+        cache.clear()
+
+    def walk(self, queue):
+        ids, current = [], queue.first()
+
+        while current:
+            ids.append(current)
+            current = queue.next(current)
+        return ids
+
+    def test_queue_goes_through_all_unknown_words_once(self):
+        ids = self.walk(ReviewQueue(self.words, 'studying_to_native', seed=42))
+        unknown_ids = self.words.filter(know_studying_to_native=False).values_list('id', flat=True)
+
+        self.assertEqual(len(ids), 15)
+        self.assertEqual(set(ids), set(unknown_ids))
+
+    def test_order_is_defined_by_seed(self):
+        first = self.walk(ReviewQueue(self.words, 'native_to_studying', seed=1))
+
+        self.assertEqual(first, self.walk(ReviewQueue(self.words, 'native_to_studying', seed='1')))
+        self.assertNotEqual(first, self.walk(ReviewQueue(self.words, 'native_to_studying', seed=2)))
+        self.assertNotEqual(first, sorted(first))
+
+    def test_next_word_after_answered_word(self):
+        queue = ReviewQueue(self.words, 'native_to_studying', seed=7)
+        ids = self.walk(queue)
+
+        Word.objects.filter(id=ids[0]).update(know_native_to_studying=True)
+
+        self.assertEqual(queue.next(ids[0]), ids[1])
+        self.assertIsNone(queue.next(ids[-1]))
+
+    def test_invalid_seed_and_direction(self):
+        self.assertTrue(0 <= ReviewQueue(self.words, 'native_to_studying', seed='abc').seed < ReviewQueue.MODULUS)
+
+        with self.assertRaises(ValueError):
+            ReviewQueue(self.words, 'invalid')
+
+    def test_card_links_keep_seed(self):
+        self.client.login(**self.credentials)
+        ids = self.walk(ReviewQueue(self.words, 'studying_to_native', seed=5))
+
+        response = self.client.get(f'/studying_to_native/{ids[0]}/?seed=5')
+
+        self.assertEqual(response.context['next_id'], ids[1])
+        self.assertContains(response, f'/studying_to_native/{ids[1]}/?seed=5')
+
+        response = self.client.get(f'/studying_to_native/{ids[-1]}/?seed=5')
+        self.assertIsNone(response.context['next_id'])
+        self.assertContains(response, 'finishButton')
+
+    def test_next_card_is_found_without_sorting_words(self):
+        queue = ReviewQueue(self.words, 'studying_to_native', seed=3)
+        ids = self.walk(queue)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(ReviewQueue(self.words, 'studying_to_native', seed=3).next(ids[4]), ids[5])
+
+        # one query by primary keys of candidates instead of ORDER BY of the computed key
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('ORDER BY', queries[0]['sql'])
+
+    def test_queue_is_found_by_database_when_pages_are_evicted(self):
+        ids = self.walk(ReviewQueue(self.words, 'native_to_studying', seed=9))
+
+        cache.clear()
+
+        with mock.patch.object(ReviewQueue, 'PAGE_SIZE', 4):
+            queue = ReviewQueue(self.words, 'native_to_studying', seed=9)
+            self.assertEqual(queue.next(ids[0]), ids[1])
+            cache.delete(queue.cache_key(2))
+
+            self.assertEqual([word.id for word in queue.upcoming(ids[2], count=10)], ids[3:13])
+            self.assertEqual(self.walk(queue), ids)
+
+    def test_pages_do_not_write_review_lists_to_session(self):
+        self.client.login(**self.credentials)
+
+        for url in ('/', '/words', '/exercises'):
+            self.client.get(url)
+
+        self.assertNotIn('studying_to_native_ids', self.client.session)
+        self.assertNotIn('native_to_studying_ids', self.client.session)
+
+
+class CardsApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        self.en = StudyingLanguage.objects.create(name='en')
+        self.user.profile.studying_lang = self.en
+        self.user.profile.save()
+        self.headers = {'Authorization': 'Token ' + Token.objects.get(user=self.user).key}
+
+        self.words = [Word.objects.create(added_by=self.user, studying_lang=self.en, word=f'word{number}',
+                                          translation=f'слово{number}') for number in range(12)]
+        for word in self.words:
+            GttsAudio.objects.create(word=word, audio_name=f'my_files/{word.word}.mp3', use='word')
+
+    def cards(self, query):
+        return json.loads(self.client.get(f'/api/cards/?{query}', headers=self.headers).content)
+
+    def test_batches_of_cards_follow_the_review_queue(self):
+        queue = ReviewQueue(Word.objects.filter(added_by=self.user), 'native_to_studying', seed=3)
+        expected = [word.id for word in queue.upcoming(count=12)]
+
+        first = self.cards('direction=native_to_studying&seed=3&count=5')
+        second = self.cards(f'direction=native_to_studying&seed=3&count=10&after={first["cards"][-1]["id"]}')
+
+        self.assertEqual([card['id'] for card in first['cards'] + second['cards']], expected)
+        self.assertTrue(first['has_more'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual(first['seed'], 3)
+
+    def test_cards_contain_audio_paths_without_query_per_card(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.cards('seed=1&count=12')
+
+        self.assertEqual(len(data['cards']), 12)
+        self.assertTrue(all(card['full_audio_word_path'] for card in data['cards']))
+        self.assertLess(len(queries), 12)
+
+    def test_invalid_direction(self):
+        response = self.client.get('/api/cards/?direction=invalid', headers=self.headers)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_submitting_batch_of_answers(self):
+        vova = User.objects.create_user(username='vova', password='12Sxz_', email='vova@gmail.com')
+        foreign_word = Word.objects.create(added_by=vova, studying_lang=self.en, word='cat', translation='кошка')
+        answers = [
+            {'id': self.words[0].id, 'direction': 'studying_to_native', 'correctness': True},
+            {'id': self.words[1].id, 'direction': 'native_to_studying', 'correctness': True},
+            {'id': self.words[2].id, 'direction': 'native_to_studying', 'correctness': False},
+            {'id': foreign_word.id, 'direction': 'native_to_studying', 'correctness': True},
+            {'id': self.words[3].id, 'direction': 'invalid', 'correctness': True},
+        ]
+
+        response = self.client.post('/api/cards/answers/', {'answers': answers}, headers=self.headers,
+                                    content_type='application/json')
+        data = json.loads(response.content)
+
+        self.assertEqual((data['applied'], data['skipped']), (3, 2))
+        self.assertTrue(Word.objects.get(id=self.words[0].id).know_studying_to_native)
+        self.assertEqual(Word.objects.get(id=self.words[0].id).times_in_row, 1)
+        self.assertTrue(Word.objects.get(id=self.words[1].id).know_native_to_studying)
+        self.assertFalse(Word.objects.get(id=self.words[2].id).know_native_to_studying)
+        self.assertFalse(Word.objects.get(id=foreign_word.id).know_native_to_studying)
+
+    def test_submitting_answers_without_list(self):
+        response = self.client.post('/api/cards/answers/', {'answers': 'yes'}, headers=self.headers,
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class SubmitAnswersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        self.en = StudyingLanguage.objects.create(name='en')
+        self.words = [Word.objects.create(added_by=self.user, studying_lang=self.en, word=f'word{number}',
+                                          translation=f'слово{number}') for number in range(50)]
+
+    def answers(self, correctness=True):
+        return [{'id': word.id, 'direction': direction, 'correctness': correctness}
+                for word in self.words for direction in ReviewQueue.DIRECTIONS]
+
+    def test_batch_is_saved_by_constant_number_of_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            applied, skipped = SubmitAnswers(self.user).perform(self.answers())
+
+        self.assertEqual((applied, skipped), (100, 0))
+        # savepoint, select of words (for update), bulk update and release of savepoint
+        self.assertLessEqual(len(queries), 4)
+        # the words are selected inside the transaction, so they are locked until they are saved
+        self.assertTrue(queries[0]['sql'].startswith('SAVEPOINT'))
+        self.assertTrue(queries[1]['sql'].startswith('SELECT'))
+
+        word = Word.objects.get(id=self.words[0].id)
+        self.assertTrue(word.is_known)
+        self.assertEqual(word.times_in_row, 2)
+        self.assertIsNotNone(word.due_at)
+
+    @override_settings(PROGRESS_COUNTERS_ENABLED=True)
+    def test_progress_counters_are_changed(self):
+        progress = lambda: CalculateUserProgress(self.user, self.en, cached=True).counts
+        self.assertEqual(progress()['total'], 0)
+
+        SubmitAnswers(self.user).perform(self.answers()[:20])
+        self.assertEqual(progress(), CalculateUserProgress(self.user, self.en).counts)
+        self.assertEqual(progress()['total'], 10)
+
+        SubmitAnswers(self.user).perform(self.answers(correctness=False)[:2])
+        self.assertEqual(progress(), CalculateUserProgress(self.user, self.en).counts)
+        self.assertEqual(progress()['total'], 9)
+
+    def test_answering_one_card_saves_word_once(self):
+        self.client.login(username='pasha', password='1asdfX')
+        word = self.words[0]
+        json_data = json.dumps({'id': word.id, 'direction': 'studying_to_native', 'correctness': True})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(f'/studying_to_native/{word.id}/', data=json_data, content_type='application/json')
+
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE "core_word"')]), 1)
+        self.assertTrue(Word.objects.get(id=word.id).know_studying_to_native)
+
+
+class VectorizedResetTests(TestCase):
+    def scalar(self, stage, times_in_row, correct_answers):
+        for _ in range(correct_answers):
+            cr = CalculateReset(stage, times_in_row).perform()
+            stage, times_in_row = cr.stage, cr.times_in_row
+        return stage, times_in_row, CalculateReset.STAGES[stage]
+
+    def test_results_match_calculate_reset(self):
+        cases = [(stage, times, answers) for stage in CalculateReset.STAGES
+                 for times in range(6) for answers in range(5)]
+
+        reset = VectorizedReset(*zip(*cases)).perform()
+        vectorized = list(zip(reset.stages, reset.times_in_row, reset.reset_in_days))
+
+        self.assertEqual([(str(stage), int(times), int(days)) for stage, times, days in vectorized],
+                         [self.scalar(*case) for case in cases])
+
+    def test_booleans_as_correctness(self):
+        reset = VectorizedReset(['day', 'month'], [3, 3], [True, False]).perform()
+
+        self.assertEqual(list(reset.stages), ['week', 'month'])
+        self.assertEqual(list(reset.times_in_row), [0, 3])
+
+    def test_due_dates(self):
+        now = timezone.now()
+        reset = VectorizedReset(['week', 'week'], [0, 0], [1, 0]).perform()
+
+        self.assertEqual(reset.due_at(now), [now + timedelta(days=7), None])
+
+    def test_invalid_stage_and_lengths(self):
+        with self.assertRaises(ValueError):
+            VectorizedReset(['day', 'year'], [0, 0])
+
+        with self.assertRaises(ValueError):
+            VectorizedReset(['day'], [0, 0])
+
+    def test_batch_of_answers_matches_answering_one_by_one(self):
+        user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        en = StudyingLanguage.objects.create(name='en')
+        words = [Word.objects.create(added_by=user, studying_lang=en, word=f'word{number}', translation='слово',
+                                     stage=stage, times_in_row=number % 4)
+                 for number, stage in enumerate(list(CalculateReset.STAGES) * 4)]
+        answers = [{'id': word.id, 'direction': direction, 'correctness': (word.id + len(direction)) % 3 > 0}
+                   for word in words for direction in ReviewQueue.DIRECTIONS]
+
+        expected = {}
+        for word in words:
+            correct = sum(answer['correctness'] for answer in answers if answer['id'] == word.id)
+            expected[word.id] = self.scalar(word.stage, word.times_in_row, correct)[:2]
+
+        SubmitAnswers(user).perform(answers)
+
+        self.assertEqual({word.id: (word.stage, word.times_in_row) for word in Word.objects.filter(added_by=user)},
+                         expected)
+
+
+class SchedulersTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        self.en = StudyingLanguage.objects.create(name='en')
+        self.word = Word.objects.create(added_by=self.user, studying_lang=self.en, word='cat', translation='кошка')
+        self.now = timezone.now()
+
+    def test_scheduler_by_name(self):
+        self.assertIsInstance(Scheduler.by_name('ladder'), LadderScheduler)
+        self.assertIsInstance(Scheduler.by_name('fsrs'), FSRSScheduler)
+
+        with self.assertRaises(ValueError):
+            Scheduler.by_name('invalid')
+
+        with self.assertRaises(TypeError):
+            Scheduler()
+
+    def test_choices_and_forecast_follow_all_schedulers(self):
+        names = [scheduler.NAME for scheduler in Scheduler.all()]
+
+        self.assertEqual([name for name, _ in Profile._meta.get_field('scheduler').choices], names)
+        self.assertEqual([scheduler.NAME for scheduler in ReviewForecast.SCHEDULERS], names)
+        self.assertEqual(list(ReviewForecast.encode_schedulers(names + [None])),
+                         list(range(len(names))) + [ReviewForecast.LADDER])
+
+    def test_sm2_starts_from_first_repetition_after_ladder(self):
+        # the streak of the ladder without an interval of SM-2
+        self.word.times_in_row = 3
+
+        intervals = []
+        for _ in range(4):
+            SM2Scheduler().answer(self.word, True, self.now)
+            intervals.append(self.word.interval)
+
+        self.assertEqual(intervals, [1, 6, 15, 38])
+
+    def test_sm2_intervals(self):
+        scheduler = SM2Scheduler()
+
+        intervals = []
+        for _ in range(4):
+            scheduler.answer(self.word, True, self.now)
+            intervals.append(self.word.interval)
+
+        self.assertEqual(intervals, [1, 6, 15, 38])
+        self.assertEqual(self.word.due_at, self.now + timedelta(days=38))
+
+        scheduler.answer(self.word, False, self.now)
+        self.assertEqual((self.word.interval, self.word.times_in_row), (1, 0))
+        self.assertAlmostEqual(self.word.ease, 1.96)
+
+    def test_sm2_ease_is_limited(self):
+        for _ in range(5):
+            SM2Scheduler().answer(self.word, False, self.now)
+
+        self.assertEqual(self.word.ease, SM2Scheduler.MIN_EASE)
+
+    def test_fsrs_first_answers(self):
+        FSRSScheduler().answer(self.word, True, self.now)
+        self.assertEqual((self.word.stability, self.word.interval), (3.7145, 4))
+        self.assertAlmostEqual(self.word.difficulty, 5.1618)
+
+        word = Word.objects.create(added_by=self.user, studying_lang=self.en, word='dog', translation='собака')
+        FSRSScheduler().answer(word, False, self.now)
+        self.assertEqual((word.stability, word.interval), (0.4872, 1))
+        self.assertAlmostEqual(word.difficulty, 7.6214)
+
+    def test_fsrs_stability_grows_after_recall_and_falls_after_lapse(self):
+        scheduler = FSRSScheduler()
+        scheduler.answer(self.word, True, self.now)
+
+        scheduler.answer(self.word, True, self.now + timedelta(days=4))
+        recalled = self.word.stability
+        self.assertGreater(recalled, 3.7145)
+        self.assertEqual(self.word.interval, round(recalled))
+
+        scheduler.answer(self.word, False, self.now + timedelta(days=4 + self.word.interval))
+        self.assertLess(self.word.stability, recalled)
+        self.assertGreater(self.word.difficulty, 5.1618)
+
+    def test_answers_of_user_are_scheduled_by_his_scheduler(self):
+        self.user.profile.scheduler = 'sm2'
+        self.user.profile.save()
+
+        SubmitAnswers(self.user).perform([{'id': self.word.id, 'direction': direction, 'correctness': True}
+                                          for direction in ReviewQueue.DIRECTIONS])
+        word = Word.objects.get(id=self.word.id)
+
+        self.assertEqual((word.interval, word.times_in_row, word.stage), (6, 2, 'day'))
+        self.assertTrue(word.is_known)
+
+    def test_overdue_words_keep_state_of_sm2(self):
+        self.user.profile.scheduler = 'sm2'
+        self.user.profile.save()
+        Word.objects.filter(id=self.word.id).update(know_native_to_studying=True, know_studying_to_native=True,
+                                                     interval=6, times_in_row=2, ease=2.6,
+                                                     due_at=timezone.now() - timedelta(minutes=1))
+        ladder_word = Word.objects.create(added_by=User.objects.create_user(username='vova', password='12Sxz_'),
+                                          studying_lang=self.en, word='dog', translation='собака', stage='week',
+                                          times_in_row=2, due_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(reset_overdue_words(), 2)
+
+        word = Word.objects.get(id=self.word.id)
+        self.assertFalse(word.is_known)
+        self.assertEqual((word.interval, word.times_in_row, word.ease), (6, 2, 2.6))
+        self.assertEqual(Word.objects.get(id=ladder_word.id).stage, 'day')
+
+    def test_choosing_scheduler(self):
+        headers = {'Authorization': 'Token ' + Token.objects.get(user=self.user).key}
+
+        response = self.client.patch('/choose_scheduler', {'scheduler': 'fsrs'}, headers=headers,
+                                     content_type='application/json')
+        self.assertEqual(json.loads(response.content)['scheduler'], 'fsrs')
+        self.assertEqual(Profile.objects.get(user=self.user).scheduler, 'fsrs')
+
+        response = self.client.patch('/choose_scheduler', {'scheduler': 'invalid'}, headers=headers,
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_switching_scheduler_resets_state_of_words(self):
+        headers = {'Authorization': 'Token ' + Token.objects.get(user=self.user).key}
+        due_at = self.now + timedelta(days=7)
+        Word.objects.filter(id=self.word.id).update(stage='week', times_in_row=3, due_at=due_at)
+
+        self.client.patch('/choose_scheduler', {'scheduler': 'sm2'}, headers=headers, content_type='application/json')
+        word = Word.objects.get(id=self.word.id)
+        self.assertEqual((word.times_in_row, word.interval, word.ease, word.due_at), (0, 0, 2.5, due_at))
+
+        SM2Scheduler().answer(word, True, self.now)
+        SM2Scheduler().answer(word, True, self.now)
+        word.save()
+        self.client.patch('/choose_scheduler', {'scheduler': 'ladder'}, headers=headers,
+                          content_type='application/json')
+        word = Word.objects.get(id=self.word.id)
+        self.assertEqual((word.stage, word.times_in_row), ('week', 0))
+
+
+class ReviewForecastTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        self.en = StudyingLanguage.objects.create(name='en')
+        self.now = timezone.now()
+
+    def create_words(self, count, user=None, **fields):
+        Word.objects.bulk_create([Word(added_by=user or self.user, studying_lang=self.en, word=f'word{number}',
+                                       translation='слово', **fields) for number in range(count)])
+
+    def test_words_of_ladder_are_reviewed_every_day(self):
+        # the ladder starts from the first stage as soon as the word is due
+        self.create_words(5)
+        self.create_words(3, due_at=self.now + timedelta(days=3, hours=1), stage='week')
+
+        forecast = ReviewForecast(Word.objects.all(), days=7, accuracy=1, start=self.now).perform()
+
+        self.assertEqual(list(forecast.daily_load), [10, 10, 10, 16, 16, 16, 16])
+        self.assertEqual(forecast.peak_load, 16)
+        self.assertEqual(forecast.peak_day, 3)
+
+    def test_incorrect_answers_increase_load(self):
+        self.create_words(200)
+
+        forecast = ReviewForecast(Word.objects.all(), days=1, accuracy=0.5, seed=1, start=self.now).perform()
+
+        self.assertGreater(forecast.peak_load, 600)
+
+    def test_words_of_sm2_are_reviewed_less_often(self):
+        self.user.profile.scheduler = 'sm2'
+        self.user.profile.save()
+        self.create_words(4)
+
+        forecast = ReviewForecast(Word.objects.all(), days=30, accuracy=1, start=self.now).perform()
+
+        # both directions are answered by one review: intervals 1 and 6 after day 0, 15 and 38 after day 6
+        self.assertEqual([day for day, load in enumerate(forecast.daily_load) if load], [0, 6])
+        self.assertEqual(forecast.daily_load.sum(), 16)
+
+    def test_schedulers_are_simulated_as_by_answers(self):
+        self.user.profile.scheduler = 'fsrs'
+        self.user.profile.save()
+        self.create_words(2)
+        self.create_words(3, stability=3.5, difficulty=6.0, interval=4, reviewed_at=self.now - timedelta(days=4),
+                          due_at=self.now + timedelta(days=2))
+
+        # words are answered one by one by the scheduler, every due word is answered in both directions
+        expected = [0] * 60
+        for word in Word.objects.all():
+            day = max((word.due_at - self.now).days, 0) if word.due_at else 0
+            while day < len(expected):
+                expected[day] += 2
+                for _ in range(2):
+                    FSRSScheduler().answer(word, True, self.now + timedelta(days=day))
+                day = max((word.due_at - self.now).days, day + 1)
+
+        with mock.patch.object(ReviewForecast, 'CHUNK_SIZE', 2):
+            forecast = ReviewForecast(Word.objects.all(), days=60, accuracy=1, start=self.now).perform()
+
+        self.assertEqual(list(forecast.daily_load), expected)
+
+    def test_load_per_user(self):
+        vova = User.objects.create_user(username='vova', password='12Sxz_', email='vova@gmail.com')
+        self.create_words(2)
+        self.create_words(5, user=vova)
+
+        forecast = ReviewForecast(Word.objects.all(), days=2, accuracy=1, start=self.now).perform()
+
+        self.assertEqual(forecast.top_users(1), [(vova.id, 10, 0)])
+
+    def test_forecast_command(self):
+        self.create_words(3)
+        out = io.StringIO()
+
+        call_command('forecast_reviews', '--days', '5', '--accuracy', '1', '--username', 'pasha', stdout=out)
+
+        self.assertIn('Peak review load: 6', out.getvalue())
+        self.assertIn(f'user {self.user.id}: 6', out.getvalue())
+
+
+class QueryStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        cls.en = StudyingLanguage.objects.create(name='en')
+        for number in range(4):
+            Word.objects.create(added_by=cls.user, studying_lang=cls.en, word=f'word{number}', translation='слово')
+
+    def test_shape_has_no_values(self):
+        self.assertEqual(QueryStats.shape("SELECT * FROM core_word WHERE id IN (%s, %s) AND word = 'cat' LIMIT 21"),
+                         'SELECT * FROM core_word WHERE id IN (...) AND word = %s LIMIT %s')
+        self.assertEqual(QueryStats.shape('SELECT * FROM core_word WHERE id IN (%s)'),
+                         QueryStats.shape('SELECT * FROM core_word WHERE id IN (%s, %s, %s)'))
+
+    def test_query_per_object_is_duplicate(self):
+        with QueryStats() as stats:
+            names = [word.studying_lang.name for word in Word.objects.all()]
+
+        self.assertEqual(names, ['en'] * 4)
+        self.assertEqual(stats.count, 5)
+        self.assertGreater(stats.duration, 0)
+        self.assertEqual(list(stats.duplicates().values()), [4])
+        self.assertEqual(stats.duplicates_count(threshold=5), 0)
+
+    def test_queries_after_exit_are_not_counted(self):
+        with QueryStats() as stats:
+            list(Word.objects.select_related('studying_lang'))
+        list(Word.objects.all())
+
+        self.assertEqual(stats.count, 1)
+        self.assertEqual(stats.duplicates(), {})
+
+    @override_settings(QUERY_COUNT_HEADERS=True)
+    def test_response_has_headers(self):
+        self.client.login(username='pasha', password='1asdfX')
+        response = self.client.get('/words')
+
+        self.assertEqual(int(response['X-DB-Query-Count']), response.wsgi_request.query_stats.count)
+        self.assertEqual(response['X-DB-Duplicate-Queries'], '0')
+        self.assertIn('X-DB-Time', response)
+
+    def test_response_has_no_headers_by_default(self):
+        self.client.login(username='pasha', password='1asdfX')
+
+        with self.assertLogs('core.middleware', level='INFO') as logs:
+            response = self.client.get('/words')
+
+        self.assertNotIn('X-DB-Query-Count', response)
+        self.assertIn(f'GET /words 200: {response.wsgi_request.query_stats.count} queries', logs.output[0])
+
+    @override_settings(QUERY_COUNT_HEADERS=True)
+    def test_n_plus_one_is_logged(self):
+        def view(request):
+            # every word makes a query for its language
+            return HttpResponse(', '.join(word.studying_lang.name for word in Word.objects.all()))
+
+        with self.assertLogs('core.middleware', level='WARNING') as logs:
+            response = QueryCountMiddleware(view)(RequestFactory().get('/words'))
+
+        self.assertEqual(response['X-DB-Query-Count'], '5')
+        self.assertEqual(response['X-DB-Duplicate-Queries'], '4')
+        self.assertIn('N+1 in GET /words: 4 queries of SELECT', logs.output[0])
+
+
+# assertQueryBudget checks the stats of the request collected by QueryCountMiddleware
+class QueryBudgetMixin:
+    def assertQueryBudget(self, response, budget):
+        stats = response.wsgi_request.query_stats
+        queries = '\n'.join(sql for sql, duration in stats.queries)
+
+        self.assertLessEqual(stats.count, budget, f'{stats.count} queries instead of {budget}:\n{queries}')
+        self.assertEqual(stats.duplicates(settings.QUERY_DUPLICATE_THRESHOLD), {}, 'N+1 queries')
+
+
+# the budgets are measured with progress counters in cache, as in production with redis
+@override_settings(PROGRESS_COUNTERS_ENABLED=True)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        cls.en = StudyingLanguage.objects.create(name='en')
+        StudyingLanguage.objects.create(name='bg')
+        cls.user.profile.studying_lang = cls.en
+        cls.user.profile.save()
+
+        cls.words = [Word.objects.create(added_by=cls.user, studying_lang=cls.en, word=f'word{number}',
+                                         translation=f'слово{number}', sentence=f'sentence {number}')
+                     for number in range(10)]
+        for word in cls.words:
+            GttsAudio.objects.create(word=word, audio_name=f'my_files/{word.word}.mp3', use='word')
+            GttsAudio.objects.create(word=word, audio_name=f'my_files/{word.word}_s.mp3', use='sentence')
+
+    def setUp(self):
+        cache.clear()
+        # the first page loads languages into the registry
+        StudyingLanguages.clear()
+        self.client.login(username='pasha', password='1asdfX')
+
+    def test_anonymous_pages(self):
+        self.client.logout()
+
+        for path in ('/', '/signup', '/signin'):
+            with self.subTest(path=path):
+                self.assertQueryBudget(self.client.get(path), 0)
+
+    def test_pages(self):
+        word = self.words[0]
+        # the session, the user and the profile take 3 queries of every page
+        # the first card of the seed sorts the queue once, the next cards don't
+        pages = (('/', 6), ('/profile', 4), ('/add_word', 4), ('/words', 7), ('/exercises', 8),
+                 (f'/studying_to_native/{word.id}/?seed=1', 8), (f'/studying_to_native/{self.words[1].id}/?seed=1', 7),
+                 (f'/native_to_studying/{word.id}/?seed=1', 8), (f'/words/{word.id}/edit/', 5))
+
+        for path, budget in pages:
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertQueryBudget(response, budget)
+
+    def test_answer(self):
+        response = self.client.post(f'/studying_to_native/{self.words[0].id}/', content_type='application/json',
+                                    data={'direction': 'studying_to_native', 'correctness': True})
+        self.assertQueryBudget(response, 6)
+
+    def test_reset_and_delete(self):
+        response = self.client.get(f'/words/{self.words[0].id}/reset/')
+        self.assertQueryBudget(response, 5)
+
+        response = self.client.get(f'/words/{self.words[1].id}/delete/')
+        self.assertQueryBudget(response, 9)
+
+    def test_sign_out(self):
+        response = self.client.get('/signout')
+        self.assertQueryBudget(response, 4)
+
+    def test_sign_up_and_sign_in(self):
+        self.client.logout()
+
+        response = self.client.post('/signup', {'username': 'vova', 'email': 'vova@gmail.com', 'password': '12Sxz_',
+                                                'password_confirmation': '12Sxz_'})
+        self.assertEqual(User.objects.filter(username='vova').count(), 1)
+        # checks of username and email, the user with his token and profile (signals)
+        self.assertQueryBudget(response, 5)
+
+        response = self.client.post('/signin', {'username': 'vova', 'password': '12Sxz_'})
+        self.assertEqual(response.status_code, 302)
+        # the user is found by the form and by authenticate, login updates last_login and saves the session
+        self.assertQueryBudget(response, 10)
+
+    # the audios are generated by celery after committing, the task is only queued by the request
+    def test_add_and_edit_word(self):
+        with mock.patch('core.forms.generate_word_audio.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/add_word', {'word': 'cat', 'translation': 'кошка', 'sentence': 'a cat'})
+            self.assertQueryBudget(response, 6)
+
+            word = Word.objects.get(word='cat')
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'/words/{word.id}/edit/', {'word': 'cats', 'translation': 'кошки',
+                                                                        'sentence': 'two cats'})
+            self.assertQueryBudget(response, 5)
+
+        self.assertEqual(delay.call_count, 2)
+
+    def test_translate(self):
+        translator = TranslateText.shared_translator()
+
+        with mock.patch.object(translator, 'translate', return_value=mock.Mock(text='кошка')):
+            response = self.client.post('/translate', content_type='application/json',
+                                        data={'source_lang': 'en', 'text': 'cat'})
+            self.assertQueryBudget(response, 0)
+
+            # the session and the user are loaded to check login
+            response = self.client.post('/translate_many', content_type='application/json',
+                                        data={'source_lang': 'en', 'texts': ['cat', 'dog']})
+            self.assertQueryBudget(response, 2)
+
+
+class BenchmarkTests(TestCase):
+    def test_data_is_generated_once(self):
+        user, = BenchmarkData(sizes=[25]).perform()
+        words = Word.objects.filter(added_by=user, studying_lang__name='en')
+
+        self.assertEqual(user.username, 'bench_25')
+        self.assertEqual(user.profile.studying_lang.name, 'en')
+        self.assertEqual(words.count(), 25)
+        self.assertEqual(GttsAudio.objects.filter(word__in=words).count(), 50)
+        self.assertEqual(Word.objects.filter(added_by=user, studying_lang__name='bg').count(), 10)
+
+        self.assertEqual(BenchmarkData(sizes=[25]).perform(), [user])
+        self.assertEqual(Word.objects.filter(added_by=user).count(), 35)
+
+    def test_data_depends_on_seed(self):
+        user, = BenchmarkData(sizes=[30], seed=1).perform()
+        progress = list(Word.objects.filter(added_by=user).order_by('id').values_list(
+            'know_studying_to_native', 'know_native_to_studying', 'stage', 'times_in_row'))
+
+        user.delete()
+        user, = BenchmarkData(sizes=[30], seed=1).perform()
+
+        self.assertEqual(progress, list(Word.objects.filter(added_by=user).order_by('id').values_list(
+            'know_studying_to_native', 'know_native_to_studying', 'stage', 'times_in_row')))
+
+    def test_all_cases_are_measured(self):
+        user, = BenchmarkData(sizes=[10]).perform()
+        results = Benchmark(user, repeat=2).perform()
+
+        self.assertIn('IndexView', results)
+        self.assertIn('ToggleLanguage', results)
+        for stats in results.values():
+            self.assertLessEqual(stats['min_ms'], stats['median_ms'])
+            self.assertLessEqual(stats['median_ms'], stats['max_ms'])
+            self.assertGreater(stats['queries'], 0)
+
+        # the studying language is restored after toggling
+        user.profile.refresh_from_db()
+        self.assertEqual(user.profile.studying_lang.name, 'en')
+
+    def test_regressions(self):
+        baseline = {'10': {'IndexView': {'median_ms': 10, 'queries': 5},
+                           'WordListView': {'median_ms': 10, 'queries': 5}}}
+        results = {'10': {'IndexView': {'median_ms': 11, 'queries': 5},
+                          'WordListView': {'median_ms': 13, 'queries': 5}},
+                   '1000': {'IndexView': {'median_ms': 100, 'queries': 5}}}
+
+        self.assertEqual([(size, name) for size, name, *stats in Benchmark.regressions(baseline, results)],
+                         [('10', 'WordListView')])
+
+        results['10']['IndexView']['queries'] = 6
+        self.assertEqual(len(Benchmark.regressions(baseline, results, tolerance=0.5)), 1)
+
+    def test_command_writes_and_compares_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline, current = os.path.join(directory, 'baseline.json'), os.path.join(directory, 'current.json')
+            out = io.StringIO()
+
+            call_command('benchmark', '--sizes', '10', '--repeat', '1', '--output', baseline, stdout=out)
+            with open(baseline) as file:
+                data = json.load(file)
+
+            self.assertEqual(data['database'], connection.vendor)
+            # the progress is calculated by the aggregate query, because locmem cache isn't shared by processes
+            self.assertEqual(data['results']['10']['WordListView']['queries'], 8)
+
+            call_command('benchmark', '--sizes', '10', '--repeat', '1', '--output', current,
+                         '--compare', baseline, '--tolerance', '100', stdout=out)
+            self.assertIn('No regressions', out.getvalue())
+
+
+class StudyContextTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        cls.en = StudyingLanguage.objects.create(name='en')
+        cls.bg = StudyingLanguage.objects.create(name='bg')
+        cls.user.profile.studying_lang = cls.en
+        cls.user.profile.save()
+
+    def context(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return StudyContext(request)
+
+    def test_values_are_loaded_once(self):
+        study = self.context(User.objects.get(id=self.user.id))
+        token = Token.objects.get(user=self.user)
+        StudyingLanguages.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            for attempt in range(3):
+                self.assertEqual(study.studying_lang, self.en)
+                self.assertEqual(study.available_languages, [self.bg])
+                self.assertEqual(study.auth_token, token)
+
+        # the profile, languages of the registry and the token
+        self.assertEqual(len(queries), 3)
+
+    def test_anonymous_user(self):
+        study = self.context(AnonymousUser())
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIsNone(study.profile)
+            self.assertIsNone(study.studying_lang)
+            self.assertEqual(study.available_languages, [])
+            self.assertIsNone(study.auth_token)
+        self.assertEqual(len(queries), 0)
+
+    def test_pages_have_languages_to_switch(self):
+        word = Word.objects.create(added_by=self.user, studying_lang=self.en, word='cat', translation='кошка')
+        self.client.login(username='pasha', password='1asdfX')
+
+        for path in ('/', f'/studying_to_native/{word.id}/', f'/words/{word.id}/edit/'):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+
+                self.assertEqual(response.context['other_languages'], [self.bg])
+                self.assertContains(response, Token.objects.get(user=self.user).key)
+                self.assertContains(response, 'data-id="bg"')
+
+
+class StudyingLanguagesTests(TestCase):
+    def setUp(self):
+        StudyingLanguages.clear()
+        self.en = StudyingLanguage.objects.create(name='en')
+        self.bg = StudyingLanguage.objects.create(name='bg')
+
+    def test_languages_are_loaded_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(StudyingLanguages.all(), [self.en, self.bg])
+            self.assertEqual(StudyingLanguages.get('bg'), self.bg)
+            self.assertEqual(StudyingLanguages.by_id(self.en.id), self.en)
+            self.assertEqual(StudyingLanguages.exclude('en'), [self.bg])
+            self.assertEqual(StudyingLanguages.exclude(None), [self.en, self.bg])
+        self.assertEqual(len(queries), 1)
+
+    def test_registry_is_cleared_by_signals(self):
+        self.assertEqual(StudyingLanguages.exclude('en'), [self.bg])
+
+        self.bg.delete()
+        self.assertEqual(StudyingLanguages.exclude('en'), [])
+
+        bg = StudyingLanguage.objects.create(name='bg')
+        self.assertEqual(StudyingLanguages.get('bg'), bg)
+
+    def test_registry_is_reloaded_after_timeout(self):
+        self.assertEqual(len(StudyingLanguages.all()), 2)
+        StudyingLanguage.objects.filter(name='bg').delete()
+
+        with self.settings(STUDYING_LANGUAGES_TIMEOUT=0):
+            self.assertEqual(StudyingLanguages.all(), [self.en])
+
+    def test_missing_language_is_reloaded(self):
+        self.assertEqual(len(StudyingLanguages.all()), 2)
+        # created by another process, so the signal doesn't clear this registry
+        with mock.patch.object(StudyingLanguages, 'clear'):
+            ro = StudyingLanguage.objects.create(name='ro')
+
+        self.assertEqual(StudyingLanguages.get('ro'), ro)
+        self.assertEqual(StudyingLanguages.by_id(ro.id), ro)
+        self.assertIsNone(StudyingLanguages.get('de'))
+
+    def test_missing_languages_are_reloaded_once_per_interval(self):
+        StudyingLanguages.all()
+
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                self.assertIsNone(StudyingLanguages.get('de'))
+        self.assertEqual(len(queries), 1)
+
+        with self.settings(STUDYING_LANGUAGES_MISS_INTERVAL=0), CaptureQueriesContext(connection) as queries:
+            self.assertIsNone(StudyingLanguages.get('de'))
+        self.assertEqual(len(queries), 1)
+
+    def test_toggle_unknown_language_without_query_of_languages(self):
+        user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        headers = {'Authorization': 'Token ' + Token.objects.get(user=user).key}
+        StudyingLanguages.all()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch('/toggle_lang', data={'studying_lang': 'de'},
+                                         content_type='application/json', headers=headers)
+
+        self.assertEqual(json.loads(response.content), {'status': 'invalid value of studying_lang'})
+        self.assertFalse([query for query in queries if 'core_studyinglanguage' in query['sql']])
+
+    def test_toggle_language_without_query_of_languages(self):
+        user = User.objects.create_user(username='pasha', password='1asdfX', email='pasha@gmail.com')
+        headers = {'Authorization': 'Token ' + Token.objects.get(user=user).key}
+        StudyingLanguages.all()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch('/toggle_lang', data={'studying_lang': 'bg'},
+                                         content_type='application/json', headers=headers)
+
+        self.assertEqual(json.loads(response.content)['full_lang_name'], 'Bulgarian')
+        self.assertFalse([query for query in queries if 'core_studyinglanguage' in query['sql']])
+        user.profile.refresh_from_db()
+        self.assertEqual(user.profile.studying_lang, self.bg)
@@ -9,12 +9,12 @@ from django.views.generic import TemplateView
 from django.views.generic.edit import FormView
 
 from core.forms import SignInForm, SignUpForm, AddWordForm, StudyingLanguageForm
-from core.lib.next_list_item import NextListItem
+from core.lib.review_queue import ReviewQueue
+from core.lib.studying_languages import StudyingLanguages
 from core.lib.translate_text import TranslateText
-from core.models import Word, MyUser
-from core.lib.word_ids import WordIds
+from core.models import Word
 # from core.tasks import reset_word_progress
-from core.lib.update_word_progress import UpdateWordProgress
+from core.lib.submit_answers import SubmitAnswers
 from core.lib.calculate_user_progress import CalculateUserProgress
 
 
@@ -24,23 +24,13 @@ class IndexView(View):
         context = {}
 
         if request.user.is_authenticated:
-            words = Word.objects.filter(added_by=request.user, 
-                                        studying_lang=request.user.profile.studying_lang)
+            # all progress metrics are retrieved from cached counters (or by one query)
+            calc = CalculateUserProgress(request.user, request.study.studying_lang, cached=True)
 
-            context['has_words'] = True if words else False
-            # update learning ids
-            WordIds(request, words).update()
+            context['has_words'] = calc.total_words_count > 0
+            # words which aren't known at least in one direction
+            context['has_unknown_words'] = calc.unknown_count > 0
 
-            context.update({
-                'other_languages': request.user.profile.available_languages,
-                'auth_token': request.user.auth_token,
-                'studying_lang': request.user.profile.studying_lang,
-                'studying_to_native_ids': request.session.get('studying_to_native_ids', []),
-                'native_to_studying_ids': request.session.get('native_to_studying_ids', []),
-            })
-
-            calc = CalculateUserProgress(request.user, request.user.profile.studying_lang)
-            
             context.update({
                 'native_studying_progress': calc.perform('native_to_studying'),
                 'studying_native_progress': calc.perform('studying_to_native'),
@@ -88,16 +78,13 @@ class SignOutView(View):
 class ProfileView(View):
     def get(self, request):
         if request.user.is_authenticated:
-            profile = MyUser.objects.get(id=request.user.id)
+            calc = CalculateUserProgress(request.user, request.study.studying_lang, cached=True)
 
             context = {
-                    'auth_token': request.user.auth_token,
-                    'total': profile.words.count(),
-                    'known': profile.known_words.count(),
-                    'unknown': profile.unknown_words.count(),
+                    'total': calc.total_words_count,
+                    'known': calc.known_count('total'),
+                    'unknown': calc.unknown_count,
                     'form': StudyingLanguageForm,
-                    'other_languages': request.user.profile.available_languages,
-                    'studying_lang': request.user.profile.studying_lang,
             }
 
             return render(request=request, template_name='profile.html', context=context)
@@ -115,15 +102,9 @@ class AddWordView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # this is used to switch studying language in two clicks 
-        context.update({
-            'auth_token': self.request.user.auth_token,
-            'studying_lang': self.request.user.profile.studying_lang,
-            'other_languages': self.request.user.profile.available_languages,
-            'form': AddWordForm(),
-        })
+        context['form'] = AddWordForm()
 
-        sl = self.request.user.profile.studying_lang
+        sl = self.request.study.studying_lang
         
         if sl:
             context.update({
@@ -145,19 +126,19 @@ class AddWordView(TemplateView):
 class WordListView(View):
     def get(self, request):
         if request.user.is_authenticated:
-            studying_lang = request.user.profile.studying_lang
+            studying_lang = request.study.studying_lang
 
             words = Word.objects.filter(added_by=request.user, studying_lang=studying_lang).order_by('know_studying_to_native', 'know_native_to_studying')
 
-            WordIds(request, words).update()
+            calc = CalculateUserProgress(request.user, studying_lang, cached=True)
 
             context = {
                 'words': words,
-                'studying_to_native_ids': request.session.get('studying_to_native_ids'),
-                'native_to_studying_ids': request.session.get('native_to_studying_ids'),
-                'auth_token': request.user.auth_token,
-                'other_languages': request.user.profile.available_languages,
-                'studying_lang': request.user.profile.studying_lang,
+                # the trainings start from the first card of queues with new seeds
+                'studying_to_native_queue': ReviewQueue(words, 'studying_to_native'),
+                'native_to_studying_queue': ReviewQueue(words, 'native_to_studying'),
+                'studying_to_native_count': calc.total_words_count - calc.known_count('studying_to_native'),
+                'native_to_studying_count': calc.total_words_count - calc.known_count('native_to_studying'),
             }
             
             if studying_lang: 
@@ -173,31 +154,27 @@ class ExercisesPageView(View):
         template_name = 'exercises_page.html'
 
         if request.user.is_authenticated:
-            # other_languages and auth_token are used to switch studying language in nav bar
+            studying_lang = request.study.studying_lang
+
             context = {
-                'other_languages': request.user.profile.available_languages, 
-                'auth_token': request.user.auth_token,
-                'studying_lang': request.user.profile.studying_lang,
-                'sl_full_name': request.user.profile.studying_lang.full_name if request.user.profile.studying_lang else None,
+                'sl_full_name': studying_lang.full_name if studying_lang else None,
             }
             
-            user_words = Word.objects.filter(added_by=request.user.id, 
-                                             studying_lang=request.user.profile.studying_lang)
+            user_words = Word.objects.filter(added_by=request.user.id, studying_lang=studying_lang)
             
             unknown_studying_to_native = user_words.filter(know_studying_to_native=False)
             unknown_native_to_studying = user_words.filter(know_native_to_studying=False)
 
-            native_word = unknown_studying_to_native.first().id if unknown_studying_to_native else None
-            studying_word = unknown_native_to_studying.first().id if unknown_native_to_studying else None
+            studying_to_native_queue = ReviewQueue(user_words, 'studying_to_native')
+            native_to_studying_queue = ReviewQueue(user_words, 'native_to_studying')
 
-
-            context.update({'learn_ru_word': native_word, 
-                            'learn_en_word': studying_word, 
+            context.update({'learn_ru_word': studying_to_native_queue.first(), 
+                            'learn_en_word': native_to_studying_queue.first(), 
+                            'learn_ru_seed': studying_to_native_queue.seed,
+                            'learn_en_seed': native_to_studying_queue.seed,
                             'count_unknown_native_to_studying': unknown_native_to_studying.count(),
                             'count_unknown_studying_to_native': unknown_studying_to_native.count(),
                 })
-            
-            studying_lang = request.user.profile.studying_lang
 
             if studying_lang:
                 context['sl_short'] = studying_lang.name
@@ -209,25 +186,23 @@ class ExercisesPageView(View):
 class StudyingToNativeCard(View):
     DIRECTION = 'studying_to_native'
 
-    def ids(self):
-        return self.request.session.get('studying_to_native_ids', [])
-
     def get(self, request, id):
         if request.user.is_authenticated:
-            # calculate the next word id for reference
-            ids = self.ids()
-
-            next_id = NextListItem(ids, id).calculate()
+            word = Word.objects.filter(id=id, added_by=request.user.id).prefetch_related('gttsaudio_set')[0]
 
-            word = Word.objects.filter(id=id, added_by=request.user.id)[0]
+            # calculate the next word id for reference, the order of cards is defined by the seed of the link
+            # the language is taken from the registry instead of a query by the foreign key
+            studying_lang = StudyingLanguages.by_id(word.studying_lang_id)
+            words = Word.objects.filter(added_by=request.user, studying_lang=studying_lang)
+            queue = ReviewQueue(words, self.DIRECTION, seed=request.GET.get('seed'))
             
             context = {
                 'word': word, 
-                'studying_language': word.studying_lang, 
-                'ids': ids, 
-                'next_id': next_id, 
+                'studying_language': studying_lang, 
+                'next_id': queue.next(word.id), 
+                'seed': queue.seed,
                 'direction': self.DIRECTION,
-                'studying_lang': word.studying_lang, # this variable has influence on notification 'please, choose studying..'
+                'studying_lang': studying_lang, # this variable has influence on notification 'please, choose studying..'
             }
 
             return render(request, template_name='translation_exercise.html', context=context)
@@ -242,15 +217,9 @@ class StudyingToNativeCard(View):
         word = get_object_or_404(Word, id=id)
 
         if word.added_by == request.user:
-            correctness = obj['correctness']
-            if correctness:
-                UpdateWordProgress(word).perform()
-
-            if obj['direction'] == 'studying_to_native':
-                word.know_studying_to_native = correctness
-            else:
-                word.know_native_to_studying = correctness
-
+            direction = 'studying_to_native' if obj['direction'] == 'studying_to_native' else 'native_to_studying'
+            # the progress and the answer are saved by one query
+            SubmitAnswers(request.user).apply(word, direction, obj['correctness'])
             word.save()
         return JsonResponse(data={'status': 'ok'})
 
@@ -258,9 +227,6 @@ class StudyingToNativeCard(View):
 class NativeToStudyingCard(StudyingToNativeCard):
     DIRECTION = 'native_to_studying'
 
-    def ids(self):
-        return self.request.session.get('native_to_studying_ids', [])
-
 
 class DeleteWordView(View):
     def get(self, request, id):
@@ -286,6 +252,8 @@ class EditWordView(TemplateView):
     def get(self, request, *args, **kwargs):
         item = get_object_or_404(Word, id=kwargs['id'])
 
+        studying_lang = StudyingLanguages.by_id(item.studying_lang_id)
+
         initial_values = {
             'word': item.word, 
             'translation': item.translation, 
@@ -294,10 +262,8 @@ class EditWordView(TemplateView):
         
         context = {
             'form': AddWordForm(initial=initial_values), 
-            'sl_short': item.studying_lang, 
-            'sl_full': item.studying_lang.full_name,
-            'auth_token': request.user.auth_token,
-            'studying_lang': request.user.profile.studying_lang,
+            'sl_short': studying_lang, 
+            'sl_full': studying_lang.full_name,
         }
 
         return render(request, template_name='edit_word.html', context=context)
@@ -336,3 +302,36 @@ class TranslateApi(View):
             'translation': translation,
         })
 
+
+# translates many texts for pages of the user (words are checked by one request), so it needs login.
+# The texts are forwarded to the upstream service, so their count and length are limited
+class TranslateManyApi(View):
+    MAX_TEXTS = 100
+    MAX_TEXT_LENGTH = 500
+    MAX_TOTAL_LENGTH = 10000
+
+    def post(self, request):
+        if not request.user.is_authenticated:
+            return JsonResponse({'status': 'authentication is required'}, status=401)
+
+        try:
+            body = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse(data={'error': 'JsonError'})
+
+        source_lang, texts = body.get('source_lang', ''), body.get('texts', [])
+
+        if not isinstance(texts, list) or len(texts) > self.MAX_TEXTS:
+            return JsonResponse({'status': f'texts must be a list of up to {self.MAX_TEXTS} strings'})
+
+        lengths = [len(text) for text in texts if isinstance(text, str)]
+        if any(length > self.MAX_TEXT_LENGTH for length in lengths) or sum(lengths) > self.MAX_TOTAL_LENGTH:
+            return JsonResponse({'status': f'texts must be up to {self.MAX_TEXT_LENGTH} characters '
+                                           f'and {self.MAX_TOTAL_LENGTH} characters in total'}, status=400)
+
+        translations = TranslateText(source_lang=source_lang, target_lang='ru').perform_many(texts=texts)
+
+        return JsonResponse({
+            'status': 'ok',
+            'translations': [translation or '' for translation in translations],
+        })
@@ -11,7 +11,9 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
 from pathlib import Path
+from urllib.parse import urlparse
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from google.oauth2 import service_account  # module to work with GCS
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -62,11 +64,18 @@ INSTALLED_APPS = [
     'allauth.socialaccount',
     'allauth.socialaccount.providers.google',
     'django_extensions',
+    'django_celery_beat',
 ]
 
+# trigram lookups of the search of words (see core/lib/word_search.py) are available only on postgres
+if PRODUCTION_MODE:
+    INSTALLED_APPS.append('django.contrib.postgres')
+
 SITE_ID = 1
 
 MIDDLEWARE = [
+    # the first one, so queries of all other middlewares are counted too
+    'core.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -76,6 +85,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'core.middleware.StudyContextMiddleware',
 ]
 
 ROOT_URLCONF = 'language_cards.urls'
@@ -91,6 +101,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.study',
             ],
         },
     },
@@ -263,6 +274,111 @@ INTERNAL_REDIS_URL = os.environ.get('INTERNAL_REDIS_URL', '')
 if INTERNAL_REDIS_URL:
     CELERY_BROKER_URL = INTERNAL_REDIS_URL
 
+# the cache backend is 'redis' (the same server as the broker of celery) or 'locmem' (memory of each process),
+# by default redis is used if INTERNAL_REDIS_URL is set. Create env variable CACHE_BACKEND to choose it explicitly
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if INTERNAL_REDIS_URL else 'locmem')
+
+# the cache is kept in the database 1 of redis, because cache.clear() flushes the whole database and
+# the database of the broker must not be flushed. Create env variable CACHE_REDIS_URL to use another server
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', urlparse(CELERY_BROKER_URL)._replace(path='/1').geturl())
+
+# the maximum count of connections to redis in the pool of each process
+REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 20))
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'OPTIONS': {
+                # when all connections are taken, the request waits for a free one (up to timeout seconds)
+                # instead of opening new connections
+                'pool_class': 'redis.BlockingConnectionPool',
+                'max_connections': REDIS_MAX_CONNECTIONS,
+                'timeout': 5,
+                'socket_connect_timeout': 5,
+                'socket_timeout': 5,
+            },
+        },
+    }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            # pages of review queues (see ReviewQueue) take many entries
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+else:
+    raise ImproperlyConfigured(f'Invalid CACHE_BACKEND: {CACHE_BACKEND}')
+
+# sessions are kept in the cache ('cache'), in the cache and db ('cached_db') or only in db ('db').
+# By default they are read from redis and written to db too if redis is the cache backend, so users aren't
+# signed out when redis is flushed or evicts keys. A session in memory of one process would be lost by other
+# processes, so without redis they are kept in db. Create env variable SESSION_BACKEND to choose it explicitly
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cached_db' if CACHE_BACKEND == 'redis' else 'db')
+
+if SESSION_BACKEND not in ('cache', 'cached_db', 'db'):
+    raise ImproperlyConfigured(f'Invalid SESSION_BACKEND: {SESSION_BACKEND}')
+
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
+# periodic tasks are stored in db by django-celery-beat, the schedule below is synced into it on beat start
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+
+# progress counters are kept in cache only if it is shared by all processes (web and celery), otherwise
+# they are calculated from db on every page (see ProgressCounters)
+PROGRESS_COUNTERS_ENABLED = CACHE_BACKEND == 'redis'
+
+# how long (in seconds) cached progress counters live before they are recalculated from db
+PROGRESS_COUNTERS_TIMEOUT = 15 * 60
+
+# how long (in seconds) translations are cached and how many of them are kept in memory of each process
+TRANSLATION_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+TRANSLATION_LOCAL_CACHE_SIZE = 4096
+
+# how long (in seconds) the sorted order of cards of one seed is kept in cache (see ReviewQueue)
+REVIEW_QUEUE_TIMEOUT = 60 * 60
+
+# how long (in seconds) each process keeps studying languages in memory (see StudyingLanguages)
+STUDYING_LANGUAGES_TIMEOUT = 5 * 60
+
+# a missing studying language reloads the languages at most once per so many seconds (see StudyingLanguages)
+STUDYING_LANGUAGES_MISS_INTERVAL = 10
+
+# a request which repeats a query of the same shape so many times is logged as N+1 (see QueryCountMiddleware)
+QUERY_DUPLICATE_THRESHOLD = 3
+
+# stats of queries are sent in the headers X-DB-* of every response with DEBUG or if env variable
+# QUERY_COUNT_HEADERS is set (see QueryCountMiddleware)
+QUERY_COUNT_HEADERS = bool(os.environ.get('QUERY_COUNT_HEADERS'))
+
+# stats of queries of every request are logged on the level INFO, N+1 on the level WARNING.
+# Create env variable QUERY_LOG_LEVEL to change the level
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.middleware': {
+            'handlers': ['console'],
+            'level': os.environ.get('QUERY_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
+
+CELERY_BEAT_SCHEDULE = {
+    # resets progress of all words whose due_at has passed
+    'reset-overdue-words': {
+        'task': 'core.tasks.reset_overdue_words',
+        'schedule': 60.0,
+    },
+}
+
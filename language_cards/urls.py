@@ -27,6 +27,8 @@ router = routers.DefaultRouter()
 router.register('words', api_views.WordViewSet)
 
 urlpatterns = [
+    path('api/cards/', api_views.CardsApi.as_view()),
+    path('api/cards/answers/', api_views.AnswersApi.as_view()),
     path('api/', include(router.urls)),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
     path('accounts/', include('allauth.urls')),
@@ -45,7 +47,9 @@ urlpatterns = [
     path('words/<int:id>/edit/', views.EditWordView.as_view()),
     path('words/<int:id>/reset/', views.ResetWordView.as_view()),
     path('translate', views.TranslateApi.as_view()),
+    path('translate_many', views.TranslateManyApi.as_view()),
     path('toggle_lang', api_views.ToggleLanguage.as_view()),
+    path('choose_scheduler', api_views.ChooseScheduler.as_view()),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)